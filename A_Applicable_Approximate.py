@@ -1,255 +1,5 @@
-import requests
-from bs4 import BeautifulSoup
-import json
-import time
-import re
+# Same as: icdscrape crawl --letters A
+from icdscrape.cli import main
 
-BASE_URL = "https://www.icd10data.com"
-CHAPTER_URL = "https://www.icd10data.com/ICD10CM/Codes/A00-B99"
-
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "  
-    "AppleWebKit/537.36 (KHTML, like Gecko) " 
-    "Chrome/91.0.4472.124 Safari/537.36"
-}
-
-#clean function=================================>1
-
-def clean(t):
-    if not t:
-        return ""
-    t = t.replace("\xa0", " ").replace("\n", " ").replace("\r", " ")
-    return re.sub(r"\s+", " ", t).strip()
-
-
-# The `get_soup` function is responsible for downloading a web page content from a given URL and
-# parsing it using BeautifulSoup library. Here's a breakdown of what it does:
-#get_soup – page download + parse========================>2
-
-def get_soup(url):
-    for _ in range(3):
-        try:
-            time.sleep(0.25)
-            r = requests.get(url, headers=HEADERS, timeout=10)
-            if r.status_code == 200:
-                return BeautifulSoup(r.text, "html.parser")
-        except:
-            time.sleep(1)
-    return None
-
-#get_description=========================================>3
-
-def get_description(soup, code):
-    ul = soup.select_one("ul.codeHierarchy")
-    if ul:
-        for li in ul.find_all("li"):
-            text = clean(li.get_text() or "")
-            if text.startswith(code):
-                return clean(text[len(code):])
-
-    h2 = soup.select_one("h2.codeDescription")
-    if h2:
-        return clean(h2.get_text().replace(code, "").strip(" -"))
-
-    h1 = soup.find("h1", class_="pageHeading")
-    if h1:
-        return clean(h1.get_text().replace(code, "").strip(" -"))
-
-    return ""
-
-# get_clinical_info, get_applicable_to, get_approximate_synonyms======================>4
-# All three same pattern, just different heading:
-
-def get_clinical_info(soup):
-    header = soup.find(lambda t:
-        t.name in ["span", "strong", "h3"]
-        and "clinical information" in t.get_text().lower()
-    )
-    if not header:
-        return []
-
-    ul = header.find_next("ul")
-    if not ul:
-        return []
-
-    return [clean(li.get_text()) for li in ul.find_all("li")]
-
-def get_applicable_to(soup):
-    header = soup.find(lambda t:
-        t.name in ["span", "strong", "h3"]
-        and "applicable to" in t.get_text().lower()
-    )
-    if not header:
-        return []
-
-    ul = header.find_next("ul")
-    if not ul:
-        return []
-
-    return [clean(li.get_text()) for li in ul.find_all("li")]
-
-
-def get_approximate_synonyms(soup):
-    header = soup.find(lambda t:
-        t.name in ["span", "strong", "h3"]
-        and "approximate synonyms" in t.get_text().lower()
-    )
-    if not header:
-        return []
-
-    ul = header.find_next("ul")
-    if not ul:
-        return []
-
-    return [clean(li.get_text()) for li in ul.find_all("li")]
-
-# Heart of the scraper: recursive function code + children==================================>5
-
-def scrape_code(url, code):
-    soup = get_soup(url)
-    if not soup:
-        return None
-
-    desc = get_description(soup, code)
-    clinical = get_clinical_info(soup)
-    applicable_to = get_applicable_to(soup)
-    synonyms = get_approximate_synonyms(soup)
-
-    node = {
-        "code": code,
-        "description": desc,
-        "clinical_information": clinical,
-        "applicable_to": applicable_to,
-        "approximate_synonyms": synonyms,
-        "children": []
-    }
-
-    body = soup.find("div", class_="body-content")
-    if not body:
-        return node
-
-    seen = set()
-    for a in body.find_all("a", href=True):
-
-        t = clean(a.get_text() or "")
-        if not t:
-            continue
-
-        c_code = t.split(" ")[0]
-
-        if (
-            c_code.startswith(code)
-            and len(c_code) > len(code)
-            and "-" not in c_code
-            and "/ICD10CM/Codes/" in a["href"]
-        ):
-            if c_code not in seen:
-                seen.add(c_code)
-                child_url = BASE_URL + a["href"]
-                print(f" → Child: {c_code}")
-
-                child = scrape_code(child_url, c_code)
-
-                if child:
-                    full_soup = get_soup(child_url)
-                    if full_soup:
-                        fd = get_description(full_soup, c_code)
-                        if fd:
-                            child["description"] = fd
-
-                    node["children"].append(child)
-
-    return node
-
-# Discover all A00–A99 range pages=======================================>6
-
-def discover_a_ranges():
-    soup = get_soup(CHAPTER_URL)
-    if not soup:
-        return []
-
-    body = soup.find("div", class_="body-content")
-    if not body:
-        return []
-
-    ranges = []
-
-    for a in body.find_all("a", href=True):
-        href = a["href"]
-        text = clean(a.get_text() or "")
-
-        if "/ICD10CM/Codes/A00-B99/" in href:
-            if re.search(r"/A\d{2}(-|–|%E2%80%93)A\d{2}$", href) or re.search(r"^A\d{2}", text):
-                full = BASE_URL + href
-                if full not in ranges:
-                    ranges.append(full)
-
-    for a in body.find_all("a", href=True):
-        href = a["href"]
-        if "/ICD10CM/Codes/A00-B99/" in href:
-            full = BASE_URL + href
-            if full not in ranges:
-                if re.search(r"/A[0-9]", href):
-                    ranges.append(full)
-
-    return sorted(list(set(ranges)))
-
-# Main function============================================>7
-
-def main():
-    print("SCRAPING A00–A99 WITH Applicable-To & Approximate-Synonyms…")
-
-    start_urls = discover_a_ranges()
-    if not start_urls:
-        print("❌ ERROR: no A-range pages found.")
-        return
-
-    categories = []
-
-    for START_URL in start_urls:
-
-        soup = get_soup(START_URL)
-        if not soup:
-            continue
-
-        body = soup.find("div", class_="body-content")
-        if not body:
-            continue
-
-        ul = body.select_one("ul.codeHierarchy")
-        if not ul:
-            continue
-
-        for li in ul.find_all("li"):
-
-            t = clean(li.get_text() or "")
-            if not t:
-                continue
-
-            code = t.split(" ")[0]
-
-            if code.startswith("A") and code[1:].isdigit() and len(code) == 3:
-                a = li.find("a")
-                if a:
-                    categories.append((code, BASE_URL + a["href"]))
-
-    if not categories:
-        print("❌ NO ROOT CODES FOUND!")
-        return
-# Remove duplicates and sort=======================================>8
-    categories = sorted(list(set(categories)))
-    data = []
-# Scrape each root code and its children==============================>9
-    for code, url in categories:
-        print(f"\nROOT → {code}")
-        res = scrape_code(url, code)
-        if res:
-            data.append(res)
-#
-    with open("A_Applicable_Approximate.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
-    print("\n✔ DONE — Saved A_Applicable_Approximate.json")
-#run fun===========================================>10
 if __name__ == "__main__":
-    main()
+    main(["crawl", "--letters", "A"])
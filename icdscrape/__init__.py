@@ -0,0 +1 @@
+"""ICD-10-CM hierarchy scraper for www.icd10data.com."""
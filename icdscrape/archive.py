@@ -0,0 +1,178 @@
+import gzip
+import os
+import time
+import uuid
+import zlib
+from collections import namedtuple
+from http import HTTPStatus
+
+# ---------------------------------------------------------
+# PAGE ARCHIVE (crawl --record / --replay)
+#
+# A standard WARC/1.0 file, one gzip member per "response" record, so
+# warcio / pywb / zcat read it too. Every response a fetch receives is
+# appended: URL, status, headers and body. Bodies are the bytes the
+# server sent, after aiohttp undid any Content-Encoding, so that header
+# and Transfer-Encoding are dropped and Content-Length is rewritten; the
+# charset in Content-Type still applies (replay decodes with it).
+#
+# Next to it, <archive>.idx holds one "offset length status url" line per
+# record; replay seeks straight to a page's gzip member instead of
+# inflating the whole file. A missing index is rebuilt by scanning.
+# The last record for a URL wins (a 429 followed by a 200 replays the 200).
+# ---------------------------------------------------------
+Response = namedtuple("Response", "status headers body")
+
+DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+
+def index_path(path):
+    return path + ".idx"
+
+def http_block(status, headers, body):
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ""
+    lines = [f"HTTP/1.1 {status} {reason}"]
+    lines += [f"{k}: {v}" for k, v in headers.items() if k.lower() not in DROP_HEADERS]
+    lines.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + body
+
+def warc_record(url, block):
+    head = "\r\n".join([
+        "WARC/1.0",
+        "WARC-Type: response",
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+        f"WARC-Date: {time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}",
+        f"WARC-Target-URI: {url}",
+        "Content-Type: application/http; msgtype=response",
+        f"Content-Length: {len(block)}",
+    ])
+    return (head + "\r\n\r\n").encode("utf-8") + block + b"\r\n\r\n"
+
+def parse_record(raw):
+    # -> (url, Response) for a response record, else None
+    head, _, rest = raw.partition(b"\r\n\r\n")
+    fields = {}
+    for line in head.decode("utf-8").split("\r\n")[1:]:
+        k, _, v = line.partition(":")
+        fields[k.strip().lower()] = v.strip()
+    if fields.get("warc-type") != "response":
+        return None
+
+    block = rest[:int(fields["content-length"])]
+    head, _, body = block.partition(b"\r\n\r\n")
+    lines = head.decode("iso-8859-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        k, _, v = line.partition(":")
+        headers[k.strip()] = v.strip()
+    return fields["warc-target-uri"], Response(status, headers, body)
+
+def members(path, step=1 << 14):
+    # (offset, length, raw record) for every gzip member of the file. Each
+    # member is inflated step bytes at a time out of a memoryview, so
+    # neither the input slices nor unused_data copy the rest of the file.
+    with open(path, "rb") as f:
+        data = memoryview(f.read())
+    offset = 0
+    while offset < len(data):
+        z = zlib.decompressobj(wbits=31)
+        parts = []
+        end = offset
+        while not z.eof and end < len(data):
+            parts.append(z.decompress(data[end:end + step]))
+            end = min(end + step, len(data))
+        length = end - offset - len(z.unused_data)
+        yield offset, length, b"".join(parts)
+        offset += length
+
+# ---------------------------------------------------------
+# RECORD
+# ---------------------------------------------------------
+class ArchiveWriter:
+
+    def __init__(self, path):
+        # appends, so a resumed crawl keeps recording into the same archive
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.f = open(path, "ab")
+        self.idx = open(index_path(path), "a", encoding="utf-8")
+        self.records = 0
+        self.bytes = 0
+
+    def add(self, url, status, headers, body):
+        member = gzip.compress(warc_record(url, http_block(status, headers, body)))
+        offset = self.f.tell()
+        self.f.write(member)
+        self.f.flush()
+        # index line only once its record is on disk
+        self.idx.write(f"{offset} {len(member)} {status} {url}\n")
+        self.idx.flush()
+        self.records += 1
+        self.bytes += len(member)
+
+    def close(self):
+        self.f.close()
+        self.idx.close()
+
+    def summary(self):
+        return (f"ARCHIVE: recorded {self.records} responses "
+                f"({self.bytes / 1e6:.1f} MB) to {self.path}")
+
+# ---------------------------------------------------------
+# REPLAY
+# ---------------------------------------------------------
+class ArchiveReader:
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; record one with crawl --record")
+        self.path = path
+        self.index = self.load_index()
+        self.f = open(path, "rb")
+        self.hits = 0
+        self.misses = 0
+
+    def load_index(self):
+        index = {}
+        if os.path.exists(index_path(self.path)):
+            with open(index_path(self.path), encoding="utf-8") as f:
+                for line in f:
+                    offset, length, _, url = line.rstrip("\n").split(" ", 3)
+                    index[url] = (int(offset), int(length))
+            return index
+
+        for offset, length, raw in members(self.path):
+            rec = parse_record(raw)
+            if rec:
+                index[rec[0]] = (offset, length)
+        return index
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def get(self, url):
+        where = self.index.get(url)
+        if where is None:
+            self.misses += 1
+            return None
+        offset, length = where
+        self.f.seek(offset)
+        _, response = parse_record(gzip.decompress(self.f.read(length)))
+        self.hits += 1
+        return response
+
+    def close(self):
+        self.f.close()
+
+    def summary(self):
+        return (f"ARCHIVE: replayed {self.hits} pages from {self.path}, "
+                f"{self.misses} not in the archive")
@@ -0,0 +1,508 @@
+import gc
+import json
+import os
+import random
+import resource
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+from bs4 import BeautifulSoup
+
+from . import diff, dom, engine, fetch, fixtures, metrics, progress
+from .archive import ArchiveReader
+from .discover import index_html
+from .index import CodeIndex
+from .node import CodeNode
+from .output import export, load_nodes, walk_tree
+from .parse import child_links, clean, get_sections, page_node, scrape_html
+
+# ---------------------------------------------------------
+# PAGE SOURCES
+# ---------------------------------------------------------
+def code_from_url(url):
+    return url.rstrip("/").rsplit("/", 1)[-1].rstrip("-")
+
+def cached_pages(path, limit=None):
+    # recorded pages straight out of the fetch cache (see cache.py)
+    db = sqlite3.connect(path)
+    sql = "SELECT p.url, b.body FROM pages p JOIN bodies b ON b.hash = p.hash ORDER BY p.url"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    pages = [(code_from_url(url), zlib.decompress(body).decode("utf-8"))
+             for url, body in db.execute(sql)]
+    db.close()
+    return pages
+
+def archived_pages(path, limit=None):
+    # 200 responses out of a crawl --record archive (see archive.py)
+    reader = ArchiveReader(path)
+    pages = []
+    for url in sorted(reader)[:limit]:
+        response = reader.get(url)
+        if response.status == 200:
+            pages.append((code_from_url(url), fetch._decode(response.headers, response.body)))
+    reader.close()
+    return pages
+
+def load_pages(cache=None, json_path=None, limit=None, archive=None):
+    if cache:
+        return cached_pages(cache, limit)
+    if archive:
+        return archived_pages(archive, limit)
+    return fixtures.load_json_pages(json_path, limit)
+
+# ---------------------------------------------------------
+# TIMING
+# ---------------------------------------------------------
+def best_of(fn, items, repeat):
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for item in items:
+            fn(item)
+        t = time.perf_counter() - t
+        best = t if best is None else min(best, t)
+    return best
+
+def report(name, seconds, n, baseline=None):
+    line = f"  {name:<28} {seconds * 1e3 / n:8.3f} ms/page"
+    if baseline:
+        line += f"   x{baseline / seconds:.2f}"
+    print(line)
+
+# ---------------------------------------------------------
+# SECTION EXTRACTORS: three lambda scans vs one pass
+# lambda_section is the original per-heading extractor, kept as baseline
+# ---------------------------------------------------------
+def lambda_section(soup, heading):
+    header = soup.find(lambda t:
+        t.name in ["span", "strong", "h3"]
+        and heading in t.get_text().lower()
+    )
+    if not header:
+        return []
+
+    ul = header.find_next("ul")
+    if not ul:
+        return []
+
+    return [clean(li.get_text()) for li in ul.find_all("li")]
+
+def three_scans(soup):
+    return {
+        "clinical_information": lambda_section(soup, "clinical information"),
+        "applicable_to": lambda_section(soup, "applicable to"),
+        "approximate_synonyms": lambda_section(soup, "approximate synonyms"),
+    }
+
+def bench_sections(pages, repeat=3):
+    dom.use("bs4")
+    soups = [BeautifulSoup(html, "html.parser") for _, html in pages]
+
+    mismatched = 0
+    for soup in soups:
+        old = three_scans(soup)
+        new = get_sections(soup)
+        if any(old[key] != new[key] for key in old):
+            mismatched += 1
+
+    print(f"section extractors on {len(soups)} pages (best of {repeat}):")
+    old_t = best_of(three_scans, soups, repeat)
+    new_t = best_of(get_sections, soups, repeat)
+    report("3 x soup.find(lambda)", old_t, len(soups))
+    report("get_sections (one pass)", new_t, len(soups), old_t)
+    print(f"  mismatched pages: {mismatched}")
+    return mismatched
+
+# ---------------------------------------------------------
+# PARSER BACKENDS: parity + parse/extract cost
+# ---------------------------------------------------------
+def extract_all(code, html):
+    doc = dom.parse(html)
+    node = page_node(doc, code)
+    node["children"] = child_links(doc, code)
+    return json.dumps([node, get_sections(doc), index_html(html)], sort_keys=True)
+
+def bench_parsers(pages, repeat=3):
+    names = dom.available()
+    dom.use("bs4")
+    reference = [extract_all(code, html) for code, html in pages]
+
+    print(f"parser backends on {len(pages)} pages (best of {repeat}):")
+    mismatched = 0
+    baseline = None
+    for name in names:
+        dom.use(name)
+        bad = [code for (code, html), ref in zip(pages, reference)
+               if extract_all(code, html) != ref]
+        mismatched += len(bad)
+
+        t = best_of(lambda p: extract_all(*p), pages, repeat)
+        baseline = baseline or t
+        report(name, t, len(pages), baseline if name != "bs4" else None)
+        if bad:
+            print(f"    {len(bad)} pages differ from bs4, e.g. {', '.join(bad[:5])}")
+
+    missing = [n for n in dom.BACKENDS if n not in names]
+    if missing:
+        print(f"  not installed: {', '.join(missing)}")
+    dom.use("bs4")
+    return mismatched
+
+# ---------------------------------------------------------
+# CODE INDEX vs walking the nested children lists
+# tree_* are what every consumer of the JSON does today (plain dicts)
+# ---------------------------------------------------------
+def load_dicts(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def tree_path(forest, code):
+    # root .. node path to the first occurrence of code, or None
+    stack = [(root, (root,)) for root in reversed(forest)]
+    while stack:
+        node, path = stack.pop()
+        if node["code"] == code:
+            return path
+        stack.extend((c, path + (c,)) for c in reversed(node["children"]))
+    return None
+
+def tree_node(forest, code):
+    path = tree_path(forest, code)
+    return path[-1] if path else None
+
+def tree_ancestors(forest, code):
+    # nearest enclosing codes: the deepest path wins, as in the index
+    best = ()
+    stack = [(root, ()) for root in forest]
+    while stack:
+        node, above = stack.pop()
+        if node["code"] == code and len(above) > len(best):
+            best = above
+        stack.extend((c, above + (node["code"],)) for c in node["children"])
+    return list(reversed(best))
+
+def tree_is_descendant(forest, code, of):
+    stack = [n for n in forest if n["code"] != code]
+    while stack:
+        node = stack.pop()
+        if node["code"] == of:
+            return any(n["code"] == code for n in fixtures.walk(node["children"]))
+        stack.extend(node["children"])
+    return False
+
+def tree_leaves(forest, code):
+    top = tree_node(forest, code)
+    found = dict.fromkeys(n["code"] for n in fixtures.walk([top]))
+    # a code the page also lists deeper down is still one leaf
+    return sorted(c for c in found if not any(
+        c2 != c and c2.startswith(c) for c2 in found))
+
+def bench_index(paths, samples=200, repeat=3):
+    forests = [load_nodes(p) for p in paths]
+    forest = [root for p in paths for root in load_dicts(p)]
+
+    t = time.perf_counter()
+    index = CodeIndex(forests)
+    built = time.perf_counter() - t
+
+    rng = random.Random(0)
+    codes = rng.sample(index.codes, min(samples, len(index)))
+    pairs = [(c, index.ancestors(c)[-1] if index.ancestors(c) else c) for c in codes]
+    groups = [c for c in index.codes if index.parent_of(c) is None][:samples // 10 or 1]
+
+    mismatched = 0
+    for c in codes:
+        mismatched += tree_node(forest, c)["description"] != index.node(c)["description"]
+        mismatched += tree_ancestors(forest, c) != index.ancestors(c)
+    for c, top in pairs:
+        mismatched += tree_is_descendant(forest, c, top) != index.is_descendant(c, top)
+    for c in groups:
+        mismatched += tree_leaves(forest, c) != sorted(index.leaves(c))
+
+    print(f"code index over {len(paths)} files: {len(index)} codes, built in {built * 1e3:.0f} ms")
+    print(f"  (times per query, best of {repeat})")
+    for name, items, slow, fast in [
+        ("lookup", codes, lambda c: tree_node(forest, c), index.node),
+        ("ancestors", codes, lambda c: tree_ancestors(forest, c), index.ancestors),
+        ("is_descendant", pairs, lambda p: tree_is_descendant(forest, *p),
+         lambda p: index.is_descendant(*p)),
+        ("leaves under a root", groups, lambda c: tree_leaves(forest, c), index.leaves),
+    ]:
+        old_t = best_of(slow, items, repeat)
+        new_t = best_of(fast, items, repeat)
+        print(f"  {name:<20} walk {old_t * 1e6 / len(items):10.1f} us"
+              f"   index {new_t * 1e6 / len(items):8.2f} us   x{old_t / new_t:,.0f}")
+    print(f"  mismatched answers: {mismatched}")
+    return mismatched
+
+# ---------------------------------------------------------
+# MEMORY: json.load dicts vs CodeNode vs CodeIndex arrays
+# ---------------------------------------------------------
+def traced(fn):
+    # (result, bytes still allocated by fn once it returns)
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+def bench_memory(paths):
+    lossy = [p for p in paths
+             if [n.to_dict() for n in load_nodes(p)] != load_dicts(p)]
+
+    dicts, dict_bytes = traced(lambda: [load_dicts(p) for p in paths])
+    n = sum(1 for roots in dicts for _ in fixtures.walk(roots))
+    del dicts
+    nodes, node_bytes = traced(lambda: [load_nodes(p) for p in paths])
+    del nodes
+    _, index_bytes = traced(lambda: CodeIndex(load_nodes(p) for p in paths))
+
+    print(f"loaded size of {len(paths)} files, {n} nodes:")
+    for name, size in [("json.load dicts", dict_bytes),
+                       ("CodeNode (__slots__)", node_bytes),
+                       ("CodeIndex (arrays)", index_bytes)]:
+        print(f"  {name:<24} {size / 1e6:8.2f} MB  {size / n:7.0f} B/node"
+              f"   x{dict_bytes / size:.1f}")
+    print(f"  CodeNode round trip differs from the JSON in {len(lossy)} files")
+    return len(lossy)
+
+# ---------------------------------------------------------
+# DOM LIFETIME: peak memory vs tree depth
+# held     : the old scrape_code shape; every ancestor's soup stays alive
+#            while its subtree is crawled
+# released : parse.scrape_html; the page record comes out and the DOM is
+#            freed before any child is visited
+# ---------------------------------------------------------
+FILLER = "".join(f'<li><a href="/sidebar/{i}">Related code {i}</a></li>' for i in range(400))
+
+def chain_pages(depth):
+    # one code per level, each page linking the next: Q, Q1, Q11, ...
+    codes = ["Q" + "1" * i for i in range(depth)]
+    pages = {}
+    for code, child in zip(codes, codes[1:] + [None]):
+        node = {
+            "code": code,
+            "description": f"Level {len(code)} condition",
+            "clinical_information": ["A long clinical paragraph. " * 20],
+            "children": [{"code": child, "description": "Deeper"}] if child else [],
+        }
+        html = fixtures.render_page(node)
+        pages[code] = html.replace("</body>", f"<ul>{FILLER}</ul></body>")
+    return pages
+
+def crawl_held(pages, code):
+    doc = dom.parse(pages[code])
+    node = page_node(doc, code)
+    for c_code, _ in child_links(doc, code):
+        node["children"].append(crawl_held(pages, c_code))
+    return node
+
+def crawl_released(pages, code):
+    # the records are what a crawl keeps anyway; only count them so the
+    # peak is the working set of the crawl itself
+    seen = 0
+    queue = [code]
+    while queue:
+        code = queue.pop()
+        page = scrape_html(pages[code], code)
+        seen += 1
+        queue.extend(c_code for c_code, _ in page.links)
+    return seen
+
+def peak(fn, *args):
+    gc.collect()
+    tracemalloc.start()
+    fn(*args)
+    size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size
+
+def depth_peaks(depths):
+    # [(held, released) peak bytes] per chain depth
+    rows = []
+    for depth in depths:
+        pages = chain_pages(depth)
+        rows.append((peak(crawl_held, pages, "Q"), peak(crawl_released, pages, "Q")))
+    return rows
+
+def depth_growth(rows):
+    # flat: releasing each DOM removes at least 90% of the growth that
+    # holding them costs (anything under 16 KB is allocator noise)
+    (held0, released0), (held1, released1) = rows[0], rows[-1]
+    grew_held = held1 - held0
+    grew_released = released1 - released0
+    return grew_held, grew_released, grew_released <= max(0.1 * grew_held, 16e3)
+
+def bench_depth(depths=(1, 2, 4, 8, 16, 32)):
+    b = dom.backend()
+    print(f"peak memory crawling a chain of pages ({b.name}):")
+    if not b.name.startswith("bs4"):
+        print("  (this backend builds its tree in C; tracemalloc only sees the Python side)")
+    print(f"  {'depth':>5} {'DOM held':>12} {'DOM released':>14}")
+    rows = depth_peaks(depths)
+    for depth, (held, released) in zip(depths, rows):
+        print(f"  {depth:>5} {held / 1e3:>9.0f} KB {released / 1e3:>11.0f} KB")
+
+    grew_held, grew_released, flat = depth_growth(rows)
+    print(f"  depth {depths[0]} -> {depths[-1]}: held +{grew_held / 1e3:.0f} KB,"
+          f" released +{grew_released / 1e3:.0f} KB ({'flat' if flat else 'GROWS'})")
+    return 0 if flat else 1
+
+# ---------------------------------------------------------
+# END-TO-END CRAWL against a local fixture server
+# Real engine, real HTTP, real parser pool; the server adds latency and
+# 503s. Rate limiting is off unless a rate is given, so the number is
+# what the crawler itself can do.
+# ---------------------------------------------------------
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)] if values else 0.0
+
+def bench_crawl(make_nodes, label, latency=0.0, jitter=0.0, error_rate=0.0, workers=0,
+                max_in_flight=engine.MAX_IN_FLIGHT, rate=None, seed=0):
+    with fixtures.FixtureServer(make_nodes, latency, jitter, error_rate, seed) as server:
+        fetch.configure(cache=False, record=None, replay=None,
+                        rate=rate or 1e6, burst=max_in_flight, max_rate=rate or 1e6,
+                        adaptive=rate is not None)
+        fetch.reset_counts()
+        metrics.reset()
+        crawled = []
+
+        def on_root(_, node):
+            crawled.append(sum(1 for _ in walk_tree(node)))
+
+        print(f"end-to-end crawl of {label}: {server.pages} pages, {server.nodes} nodes")
+        print(f"  server: latency {latency * 1e3:.0f}+{jitter * 1e3:.0f} ms,"
+              f" {error_rate:.1%} 503s; crawler: {dom.backend().name},"
+              f" {workers} parser workers, {max_in_flight} in flight,"
+              f" rate {rate or 'unlimited'}")
+
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = time.process_time()
+        t = time.perf_counter()
+        progress.start("bench")
+        try:
+            engine.scrape_groups({None: server.roots}, on_root, lambda _: None,
+                                 max_in_flight, workers=workers)
+        finally:
+            progress.stop()
+        wall = time.perf_counter() - t
+        cpu = time.process_time() - cpu
+        # parser workers are joined by now; the server is still running
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        own = resource.getrusage(resource.RUSAGE_SELF)
+
+    pages = len(fetch.fetch_counts())
+    lat = fetch.latencies()
+    errors = len(lat) - pages
+    fetch.close()
+
+    print(f"  wall     {wall:8.2f} s   {pages / wall:8.1f} pages/s")
+    print(f"  fetch    p50 {percentile(lat, 0.5) * 1e3:.1f} ms   "
+          f"p99 {percentile(lat, 0.99) * 1e3:.1f} ms   ({len(lat)} requests, {errors} retried)")
+    parsers = after.ru_utime + after.ru_stime - before.ru_utime - before.ru_stime
+    print(f"  cpu      main {cpu:.2f} s   parsers {max(parsers, 0.0):.2f} s")
+    print(f"  peak rss main {own.ru_maxrss / 1e3:.0f} MB   parsers {after.ru_maxrss / 1e3:.0f} MB")
+
+    if metrics.METRICS["enabled"]:
+        print(metrics.summary())
+
+    # what progress reporting cost: the renders it timed itself, plus as
+    # many counter bumps as the crawl made
+    renders, render_seconds = progress.cost()
+    events = progress.counts()["found"] + progress.counts()["visited"]
+    e = time.perf_counter()
+    for _ in range(events):
+        progress.found(0)
+    e = time.perf_counter() - e
+    print(f"  progress {progress.mode()}: {renders} renders {render_seconds * 1e3:.1f} ms,"
+          f" {events} events {e * 1e3:.1f} ms ({(render_seconds + e) / wall:.3%} of wall)")
+
+    ok = sum(crawled) == server.nodes
+    print(f"  crawled {sum(crawled)} of {server.nodes} nodes ({'ok' if ok else 'INCOMPLETE'})")
+    return 0 if ok else 1
+
+# ---------------------------------------------------------
+# DIFF: a seeded edit of every output file, diffed back
+# Each file gets renamed descriptions, edited sections, new and removed
+# leaves and a subtree moved under another parent, and hands its last
+# root to the next file. The changeset applied to the old run's codes
+# must give exactly the new run's codes.
+# ---------------------------------------------------------
+def walk_parents(root):
+    stack = [(root, None)]
+    while stack:
+        node, parent = stack.pop()
+        yield node, parent
+        stack.extend((child, node) for child in node.children)
+
+def edit_tree(roots, rng, edits):
+    nodes = [pair for root in roots for pair in walk_parents(root)]
+    for n in range(edits):
+        node, parent = rng.choice(nodes)
+        kind = n % 5
+        if kind == 0:
+            node.description += " (revised)"
+        elif kind == 1:
+            node.approximate_synonyms += (f"Synonym {n}",)
+        elif kind == 2:
+            node.add_child(CodeNode(f"{node.code}.N{n}", f"New code {n}"))
+        elif parent is None or node not in parent.children:
+            continue
+        elif kind == 3:
+            parent.children.remove(node)
+        else:
+            other, _ = rng.choice(nodes)
+            if all(other is not below for below, _ in walk_parents(node)):
+                parent.children.remove(node)
+                other.add_child(node)
+    return roots
+
+def bench_diff(paths, edits=50, seed=0):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        old_dir, new_dir = os.path.join(tmp, "old"), os.path.join(tmp, "new")
+        os.makedirs(old_dir)
+        os.makedirs(new_dir)
+        trees = [edit_tree(load_nodes(path), rng, edits) for path in paths]
+        handed = [tree.pop() for tree in trees[:-1]]
+        for root, tree in zip(handed, trees[1:]):
+            tree.append(root)
+        size = 0
+        for path, tree in zip(paths, trees):
+            name = os.path.basename(path)
+            shutil.copy(path, os.path.join(old_dir, name))
+            export(tree, "json", os.path.join(new_dir, name))
+            size += os.path.getsize(path)
+
+        t = time.perf_counter()
+        with open(os.path.join(tmp, "changes.jsonl"), "w", encoding="utf-8") as f:
+            ops = diff.write(diff.diff(old_dir, new_dir), f)
+        seconds = time.perf_counter() - t
+
+        names = [os.path.basename(path) for path in paths]
+        codes = diff.flat_codes(*(os.path.join(old_dir, name) for name in names))
+        with open(os.path.join(tmp, "changes.jsonl"), encoding="utf-8") as f:
+            diff.apply(codes, (json.loads(line) for line in f))
+        new = diff.flat_codes(*(os.path.join(new_dir, name) for name in names))
+        mismatched = sum(codes.get(code) != rec for code, rec in new.items())
+        mismatched += sum(code not in new for code in codes)
+
+        skipped = []
+        t = time.perf_counter()
+        same = sum(1 for _ in diff.diff(old_dir, old_dir, skipped))
+        unchanged = time.perf_counter() - t
+
+    print(f"diff of {len(paths)} files ({size / 1e6:.1f} MB), {edits} edits each:")
+    print(f"  {sum(ops.values())} changes in {seconds:.2f} s  ("
+          + ", ".join(f"{n} {op}" for op, n in ops.items()) + ")")
+    print(f"  unchanged run: {same} changes, {len(skipped)} files skipped, {unchanged:.2f} s")
+    print(f"  changeset applied to the old run differs from the new run in {mismatched} codes")
+    return mismatched
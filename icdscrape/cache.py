@@ -0,0 +1,183 @@
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+
+# ---------------------------------------------------------
+# ON-DISK PAGE CACHE
+# Bodies are stored once per sha256 (many URLs can share one body);
+# pages map URL -> body hash plus the validators the server gave us.
+# A lookup only notes when the URL was used; the notes are written in
+# one batch every TOUCH_EVERY lookups (and before eviction or close),
+# not as a commit per page on the event loop.
+# ---------------------------------------------------------
+TOUCH_EVERY = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (
+    hash TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    hash TEXT NOT NULL REFERENCES bodies(hash),
+    etag TEXT,
+    last_modified TEXT,
+    validated_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_used ON pages(used_at);
+CREATE INDEX IF NOT EXISTS pages_hash ON pages(hash);
+"""
+
+
+class CacheEntry:
+    __slots__ = ("url", "hash", "body", "etag", "last_modified", "validated_at")
+
+    def __init__(self, url, hash, body, etag, last_modified, validated_at):
+        self.url = url
+        self.hash = hash
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.validated_at = validated_at
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+
+    def __init__(self, path, ttl=None, max_bytes=None, cache_only=False):
+        self.path = path
+        self.ttl = ttl                  # seconds since last validation
+        self.max_bytes = max_bytes      # cap on stored (compressed) bodies
+        self.cache_only = cache_only    # never touch the network
+        self.hits = 0                   # served without a request (cache_only)
+        self.revalidated = 0
+        self.misses = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._touched = {}              # url -> used_at not yet written
+        self.evict()
+        self.bytes = self.size()
+
+    def close(self):
+        self.flush_touched()
+        self.db.close()
+
+    # -----------------------------------------------------
+    # READ
+    # -----------------------------------------------------
+    def get(self, url):
+        row = self.db.execute(
+            "SELECT p.hash, b.body, p.etag, p.last_modified, p.validated_at "
+            "FROM pages p JOIN bodies b ON b.hash = p.hash WHERE p.url = ?",
+            (url,),
+        ).fetchone()
+        if not row:
+            return None
+
+        h, body, etag, last_modified, validated_at = row
+        if self.ttl is not None and time.time() - validated_at > self.ttl:
+            return None
+
+        self._touched[url] = time.time()
+        if len(self._touched) >= TOUCH_EVERY:
+            self.flush_touched()
+        return CacheEntry(url, h, zlib.decompress(body).decode("utf-8"),
+                          etag, last_modified, validated_at)
+
+    def flush_touched(self):
+        if self._touched:
+            self.db.executemany("UPDATE pages SET used_at = ? WHERE url = ?",
+                                [(t, url) for url, t in self._touched.items()])
+            self.db.commit()
+            self._touched = {}
+
+    # -----------------------------------------------------
+    # WRITE
+    # -----------------------------------------------------
+    def put(self, url, text, headers):
+        raw = text.encode("utf-8")
+        h = hashlib.sha256(raw).hexdigest()
+        now = time.time()
+
+        if not self.db.execute("SELECT 1 FROM bodies WHERE hash = ?", (h,)).fetchone():
+            blob = zlib.compress(raw)
+            self.db.execute("INSERT INTO bodies (hash, body, size) VALUES (?, ?, ?)",
+                            (h, blob, len(blob)))
+            self.bytes += len(blob)
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO pages "
+            "(url, hash, etag, last_modified, validated_at, used_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (url, h, headers.get("ETag"), headers.get("Last-Modified"), now, now),
+        )
+        self.db.commit()
+        self.misses += 1
+        if self.max_bytes is not None and self.bytes > self.max_bytes:
+            self.evict()
+            self.bytes = self.size()
+
+    def mark_validated(self, url, headers):
+        # 304: the stored body is still current; servers may rotate validators
+        now = time.time()
+        self.db.execute(
+            "UPDATE pages SET validated_at = ?, used_at = ?, "
+            "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) "
+            "WHERE url = ?",
+            (now, now, headers.get("ETag"), headers.get("Last-Modified"), url),
+        )
+        self.db.commit()
+        self.revalidated += 1
+
+    # -----------------------------------------------------
+    # EVICTION (TTL, then least-recently-used down to size cap)
+    # -----------------------------------------------------
+    def evict(self):
+        self.flush_touched()
+        if self.ttl is not None:
+            self.db.execute("DELETE FROM pages WHERE validated_at < ?",
+                            (time.time() - self.ttl,))
+
+        if self.max_bytes is not None:
+            total = self.size()
+            if total > self.max_bytes:
+                rows = self.db.execute(
+                    "SELECT p.url, b.size FROM pages p JOIN bodies b ON b.hash = p.hash "
+                    "ORDER BY p.used_at"
+                ).fetchall()
+                doomed = []
+                for url, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    doomed.append((url,))
+                    total -= size
+                self.db.executemany("DELETE FROM pages WHERE url = ?", doomed)
+
+        self.db.execute("DELETE FROM bodies WHERE hash NOT IN (SELECT hash FROM pages)")
+        self.db.commit()
+
+    def size(self):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM bodies").fetchone()[0]
+
+    def summary(self):
+        if self.cache_only:
+            return f"CACHE: {self.hits} served from cache, {self.bytes / 1e6:.1f} MB on disk"
+        return (f"CACHE: {self.revalidated} revalidated (304), "
+                f"{self.misses} downloaded, {self.bytes / 1e6:.1f} MB on disk")
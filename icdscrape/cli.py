@@ -0,0 +1,368 @@
+import argparse
+import glob
+import os
+import sqlite3
+import sys
+import time
+from functools import partial
+
+from . import db, diff, dom, engine, fetch, fixtures, index, metrics, output, progress
+from .crawl import JOURNAL_DIR, MANIFEST_DIR, crawl
+from .letters import parse_letters
+from .parse import TEXT_LISTS
+from .pipeline import default_workers
+
+# ---------------------------------------------------------
+# ARGUMENTS
+# ---------------------------------------------------------
+def add_parser_arg(p):
+    p.add_argument("--parser", choices=sorted(dom.BACKENDS), default=dom.backend().name,
+                   help="HTML parser backend (default: %(default)s)")
+
+def add_db_arg(p):
+    p.add_argument("--db", default=db.DB_PATH, help="SQLite store (default: %(default)s)")
+
+def add_fetch_args(p):
+    g = p.add_argument_group("http")
+    g.add_argument("--max-in-flight", type=int, default=engine.MAX_IN_FLIGHT,
+                   help="requests on the wire at once")
+    g.add_argument("--pool-size", type=int, default=fetch.POOL["pool_size"])
+    g.add_argument("--per-host", type=int, default=fetch.POOL["per_host"])
+    g.add_argument("--no-keepalive", action="store_true")
+
+    g = p.add_argument_group("rate limit")
+    g.add_argument("--rate", type=float, default=fetch.RATE["rate"],
+                   help="requests/s to start at (default: %(default)s)")
+    g.add_argument("--burst", type=int, default=fetch.RATE["burst"])
+    g.add_argument("--max-rate", type=float, default=fetch.RATE["max_rate"],
+                   help="ceiling when ramping up on healthy responses")
+    g.add_argument("--no-adaptive", action="store_true",
+                   help="hold --rate fixed (Retry-After is still honoured)")
+
+    g = p.add_argument_group("cache")
+    g.add_argument("--cache", dest="cache_path", default=fetch.CACHE["cache_path"],
+                   help="SQLite page cache (default: %(default)s)")
+    g.add_argument("--no-cache", action="store_true")
+    g.add_argument("--cache-only", action="store_true",
+                   help="serve every page from the cache, never hit the network")
+    g.add_argument("--cache-ttl", type=float, default=None,
+                   help="drop cached pages not revalidated for this many days")
+    g.add_argument("--cache-max-mb", type=float,
+                   default=fetch.CACHE["cache_max_bytes"] / 1e6)
+
+    g = p.add_argument_group("page archive").add_mutually_exclusive_group()
+    g.add_argument("--record", metavar="WARC",
+                   help="append every response to this WARC archive (e.g. pages.warc.gz)")
+    g.add_argument("--replay", metavar="WARC",
+                   help="serve every page from this archive, never hit the network")
+
+def add_metrics_args(p):
+    g = p.add_argument_group("metrics")
+    g.add_argument("--no-metrics", action="store_true",
+                   help="skip per-stage timers and counters")
+    g.add_argument("--metrics-json", metavar="PATH",
+                   help="rewrite a JSON snapshot of the metrics here while crawling")
+    g.add_argument("--metrics-interval", type=float, default=metrics.METRICS["interval"],
+                   help="seconds between JSON snapshots (default: %(default)s)")
+    g.add_argument("--metrics-port", type=int,
+                   help="serve Prometheus text on http://127.0.0.1:PORT/metrics")
+
+def add_progress_args(p, default="auto"):
+    g = p.add_argument_group("progress")
+    g.add_argument("--progress", choices=progress.MODES, default=default,
+                   help="bar: status line on a terminal; lines: periodic plain lines; "
+                        "json: JSON log lines on stderr (default: %(default)s)")
+    g.add_argument("--progress-interval", type=float,
+                   help="seconds between status updates (default: 0.5 for bar, 10 otherwise)")
+
+def apply_progress_args(args):
+    progress.configure(mode=args.progress, interval=args.progress_interval)
+
+def apply_metrics_args(args):
+    metrics.configure(
+        enabled=not args.no_metrics,
+        json_path=args.metrics_json,
+        interval=args.metrics_interval,
+        port=args.metrics_port,
+    )
+
+def apply_fetch_args(args):
+    fetch.configure(
+        pool_size=args.pool_size,
+        per_host=args.per_host,
+        keepalive=not args.no_keepalive,
+        rate=args.rate,
+        burst=args.burst,
+        max_rate=args.max_rate,
+        adaptive=not args.no_adaptive,
+        cache=not args.no_cache,
+        cache_path=args.cache_path,
+        cache_only=args.cache_only,
+        cache_ttl=args.cache_ttl * 86400 if args.cache_ttl is not None else None,
+        cache_max_bytes=int(args.cache_max_mb * 1e6),
+        record=args.record,
+        replay=args.replay,
+    )
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="icdscrape",
+                                     description="ICD-10-CM A-Z hierarchy scraper")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("crawl", help="scrape letters into *_Applicable_Approximate.json")
+    p.add_argument("--letters", type=parse_letters, default="A-Z",
+                   help='e.g. "A-Z", "S,T", "A-C,T"')
+    p.add_argument("--out", default=".", help="output directory")
+    p.add_argument("--format", dest="fmt", choices=sorted(output.FORMATS), default="json",
+                   help="json: nested tree (default); jsonl: one flat record per code "
+                        "with parent/depth, written as each page is scraped")
+    p.add_argument("--journal", default=JOURNAL_DIR,
+                   help="checkpoint journal folder; a rerun resumes from it (default: %(default)s)")
+    p.add_argument("--no-journal", action="store_true")
+    p.add_argument("--fresh", action="store_true", help="ignore existing journals")
+    p.add_argument("--incremental", nargs="?", const="subtrees", choices=["subtrees", "pages"],
+                   help="refresh against the last finished run; unchanged pages are not "
+                        "re-parsed. subtrees (default): pages below an unchanged page are "
+                        "not fetched either; pages: fetch every page (304s with the cache)")
+    p.add_argument("--manifest", default=MANIFEST_DIR,
+                   help="where finished runs are kept for --incremental (default: %(default)s)")
+    add_parser_arg(p)
+    p.add_argument("--workers", type=int, default=default_workers(),
+                   help="parser processes; 0 parses on the event loop "
+                        "(default: cores - 1 = %(default)s)")
+    add_fetch_args(p)
+    add_metrics_args(p)
+    add_progress_args(p)
+
+    p = sub.add_parser("convert", help="re-export scraped trees in another output format")
+    p.add_argument("files", nargs="+", help="*_Applicable_Approximate.json or .strtab.json")
+    p.add_argument("--to", dest="fmt", choices=sorted(output.FORMATS), required=True)
+    p.add_argument("--out", help="output directory (default: next to each input)")
+
+    p = sub.add_parser("diff", help="changeset between two runs' outputs, as JSON lines "
+                                    "(exit 1: changes found, 2: error)")
+    p.add_argument("old", help="folder (or one file) of the earlier run")
+    p.add_argument("new", help="folder (or one file) of the later run")
+    p.add_argument("--out", help="write the changeset here (default: stdout)")
+
+    p = sub.add_parser("build-db", help="load outputs into an indexed, searchable SQLite file")
+    p.add_argument("files", nargs="*",
+                   help="outputs to load (default: *_Applicable_Approximate.json here)")
+    add_db_arg(p)
+
+    p = sub.add_parser("lookup", help="show one code from the SQLite store")
+    p.add_argument("code")
+    add_db_arg(p)
+
+    p = sub.add_parser("search", help="full-text search descriptions and synonyms")
+    p.add_argument("query")
+    p.add_argument("--field", choices=db.SEARCH_FIELDS, help="search one field only")
+    p.add_argument("--raw", action="store_true", help="query is FTS5 syntax (AND/OR/NEAR, prefix*)")
+    p.add_argument("--limit", type=int, default=20)
+    add_db_arg(p)
+
+    p = sub.add_parser("bench", help="micro-benchmarks on recorded or synthetic pages")
+    p.add_argument("what", choices=["sections", "parsers", "index", "memory", "depth", "crawl", "diff"])
+    src = p.add_mutually_exclusive_group()
+    src.add_argument("--cache", help="use pages recorded in this page cache")
+    src.add_argument("--archive", help="use pages recorded in this WARC archive")
+    src.add_argument("--synthetic", action="store_true",
+                     help="crawl: serve a generated tree (--roots/--breadth/--depth)")
+    src.add_argument("--json", default="A_Applicable_Approximate.json",
+                     help="render synthetic pages from this output (default: %(default)s)")
+    p.add_argument("--limit", type=int, default=500, help="pages to use")
+    p.add_argument("--repeat", type=int, default=3)
+    add_parser_arg(p)
+
+    g = p.add_argument_group("crawl (local fixture server)")
+    g.add_argument("--roots", type=int, default=10)
+    g.add_argument("--breadth", type=int, default=5, help="children per page")
+    g.add_argument("--depth", type=int, default=3, help="levels below each root")
+    g.add_argument("--latency", type=float, default=20.0, help="ms added to every response")
+    g.add_argument("--jitter", type=float, default=10.0, help="up to this many ms more")
+    g.add_argument("--error-rate", type=float, default=0.01, help="fraction of 503 replies")
+    g.add_argument("--seed", type=int, default=0)
+    g.add_argument("--workers", type=int, default=default_workers())
+    g.add_argument("--max-in-flight", type=int, default=engine.MAX_IN_FLIGHT)
+    g.add_argument("--rate", type=float, help="pace requests (default: unlimited)")
+    g.add_argument("--no-metrics", action="store_true", help="crawl with metrics disabled")
+    add_progress_args(p)
+
+    return parser
+
+# ---------------------------------------------------------
+# COMMANDS
+# ---------------------------------------------------------
+def cmd_crawl(args):
+    if args.replay and not os.path.exists(args.replay):
+        print(f"❌ {args.replay} not found; record one with crawl --record")
+        return 1
+
+    dom.use(args.parser)
+    apply_fetch_args(args)
+    apply_metrics_args(args)
+    apply_progress_args(args)
+    exporter = metrics.start()
+    try:
+        ok = crawl(args.letters, args.out, args.max_in_flight,
+              journal_dir=None if args.no_journal else args.journal,
+              fresh=args.fresh, workers=args.workers, fmt=args.fmt,
+              incremental=args.incremental, manifest_dir=args.manifest)
+    finally:
+        fetch.close()
+        if exporter:
+            exporter.stop()
+    return 0 if ok else 1
+
+def cmd_convert(args):
+    ext = output.FORMATS[args.fmt].ext
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    for src in args.files:
+        stem = os.path.basename(src)
+        for old in sorted((cls.ext for cls in output.FORMATS.values()), key=len, reverse=True):
+            if stem.endswith("." + old):
+                stem = stem[:-len(old) - 1]
+                break
+        dst = os.path.join(args.out or os.path.dirname(src), f"{stem}.{ext}")
+        if os.path.abspath(dst) == os.path.abspath(src):
+            print(f"skip {src}: already {args.fmt}")
+            continue
+
+        output.export(output.load_nodes(src), args.fmt, dst)
+        a, b = os.path.getsize(src), os.path.getsize(dst)
+        print(f"{src} ({a:,} B) -> {dst} ({b:,} B, x{a / b:.1f})")
+
+def cmd_diff(args):
+    try:
+        diff.pairs(args.old, args.new)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    t = time.perf_counter()
+    out = output.AtomicWriter(args.out) if args.out else None
+    f = out.f if out else sys.stdout
+    skipped = []
+    try:
+        ops = diff.write(diff.diff(args.old, args.new, skipped), f)
+        if out:
+            out.commit()
+    except BaseException:
+        if out:
+            out.abort()
+        raise
+
+    print(f"{sum(ops.values())} changes ("
+          + ", ".join(f"{n} {op}" for op, n in ops.items())
+          + f"), {len(skipped)} identical files skipped, "
+            f"{time.perf_counter() - t:.1f}s", file=sys.stderr)
+    return 1 if any(ops.values()) else 0
+
+def cmd_build_db(args):
+    files = args.files or sorted(glob.glob("*_Applicable_Approximate.json"))
+    if not files:
+        print("❌ no *_Applicable_Approximate.json files to load")
+        return 1
+
+    t = time.perf_counter()
+    codes, edges, items = db.build(files, args.db)
+    print(f"✔ {args.db}: {codes} codes, {edges} edges, {items} section entries "
+          f"from {len(files)} files in {time.perf_counter() - t:.1f}s")
+
+def open_db(path):
+    # -> connection, or None after printing why not
+    try:
+        conn = db.connect(path)
+        conn.execute("SELECT 1 FROM codes LIMIT 1")
+        return conn
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+    except sqlite3.DatabaseError as e:
+        print(f"❌ {path}: {e}")
+    return None
+
+def cmd_lookup(args):
+    conn = open_db(args.db)
+    if conn is None:
+        return 1
+    t = time.perf_counter()
+    node = db.lookup(conn, args.code)
+    ms = (time.perf_counter() - t) * 1e3
+    if node is None:
+        print(f"❌ {args.code} not found")
+        return 1
+
+    print(f"{node['code']}  {node['description']}")
+    print(f"  parent: {node['parent'] or '-'}   children: {', '.join(node['children']) or '-'}")
+    for key in TEXT_LISTS:
+        for text in node[key]:
+            print(f"  [{key}] {text}")
+    print(f"({ms:.2f} ms)")
+
+def cmd_search(args):
+    conn = open_db(args.db)
+    if conn is None:
+        return 1
+    t = time.perf_counter()
+    try:
+        rows = db.search(conn, args.query, args.limit, args.field, args.raw)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    ms = (time.perf_counter() - t) * 1e3
+    for code, description in rows:
+        print(f"{code:<10} {description}")
+    print(f"({len(rows)} results, {ms:.2f} ms)")
+
+def cmd_bench(args):
+    from . import bench
+
+    if args.what == "depth":
+        dom.use(args.parser)
+        return bench.bench_depth()
+
+    if args.what == "crawl":
+        dom.use(args.parser)
+        metrics.configure(enabled=not args.no_metrics)
+        apply_progress_args(args)
+        if args.synthetic:
+            tree = partial(fixtures.synthetic_tree, args.roots, args.breadth, args.depth)
+            label = f"{args.roots} roots x breadth {args.breadth} x depth {args.depth}"
+        else:
+            tree, label = partial(fixtures.load_tree, args.json), args.json
+        return bench.bench_crawl(tree, label, args.latency / 1e3, args.jitter / 1e3,
+                                 args.error_rate, args.workers, args.max_in_flight,
+                                 args.rate, args.seed)
+
+    if args.what in ("index", "memory", "diff"):
+        paths = sorted(glob.glob(index.DEFAULT_FILES))
+        if args.what == "diff":
+            return 1 if bench.bench_diff(paths, seed=args.seed) else 0
+        if args.what == "index":
+            return 1 if bench.bench_index(paths, repeat=args.repeat) else 0
+        return 1 if bench.bench_memory(paths) else 0
+
+    pages = bench.load_pages(args.cache, args.json, args.limit, args.archive)
+    if args.what == "sections":
+        return 1 if bench.bench_sections(pages, args.repeat) else 0
+    if args.what == "parsers":
+        return 1 if bench.bench_parsers(pages, args.repeat) else 0
+
+COMMANDS = {
+    "crawl": cmd_crawl,
+    "convert": cmd_convert,
+    "diff": cmd_diff,
+    "build-db": cmd_build_db,
+    "lookup": cmd_lookup,
+    "search": cmd_search,
+    "bench": cmd_bench,
+}
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    return COMMANDS[args.command](args)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
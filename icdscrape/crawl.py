@@ -0,0 +1,139 @@
+import asyncio
+import os
+
+from . import engine, fetch, metrics, progress
+from .discover import discover
+from .journal import Journal, Manifest, journal_path
+from .letters import output_name
+from . import output
+
+JOURNAL_DIR = os.path.join(".icdcache", "journal")
+MANIFEST_DIR = os.path.join(".icdcache", "manifest")
+INCREMENTAL = (None, "subtrees", "pages")
+
+# ---------------------------------------------------------
+# CRAWL LETTERS (one client, one cache, one in-flight limit)
+# ---------------------------------------------------------
+def open_journals(letters, folder, fresh=False):
+    journals = {}
+    for letter in letters:
+        path = journal_path(folder, letter)
+        if fresh and os.path.exists(path):
+            os.remove(path)
+        journals[letter] = j = Journal(path)
+        if j.resumed:
+            progress.log("resume", f"{letter}: resuming, {j.resumed} pages already journaled",
+                         letter=letter, journaled=j.resumed)
+    return journals
+
+def open_manifests(letters, folder):
+    manifests = {}
+    for letter in letters:
+        m = Manifest(journal_path(folder, letter))
+        if m:
+            manifests[letter] = m
+            progress.log("incremental", f"{letter}: incremental, {len(m)} pages known",
+                         letter=letter, known=len(m))
+        else:
+            progress.log("incremental", f"{letter}: no manifest yet, full crawl",
+                         letter=letter, known=0)
+    return manifests
+
+def root_groups(letters, found):
+    # {letter: roots} for the letters discovery found roots for
+    groups = {}
+    for letter in letters:
+        ranges, roots = found[letter]
+        if not ranges:
+            progress.log("error", f"❌ {letter}: no range pages found.",
+                         letter=letter, reason="no range pages")
+            continue
+        if not roots:
+            progress.log("error", f"❌ {letter}: no root codes found.",
+                         letter=letter, reason="no root codes")
+            continue
+
+        progress.log("discovered", f"{letter}: {len(ranges)} range pages, {len(roots)} root codes",
+                     letter=letter, ranges=len(ranges), roots=len(roots))
+        groups[letter] = roots
+    return groups
+
+async def crawl_letters(letters, out_dir, max_in_flight, journal_dir, fresh, workers, fmt,
+                        incremental, manifest_dir):
+    # discovery and the crawl share one client on one event loop; -> saved letters
+    async with fetch.client() as client:
+        groups = root_groups(letters, await discover(client, letters, max_in_flight))
+
+        journals = open_journals(groups, journal_dir, fresh) if journal_dir else {}
+        previous = open_manifests(groups, manifest_dir) if incremental else None
+
+        # each letter streams into <name>.tmp and is renamed into place when done
+        ext = output.FORMATS[fmt].ext
+        writers = {letter: output.writer(fmt, os.path.join(out_dir, output_name(letter, ext)))
+                   for letter in groups}
+
+        def emit_root(letter, node):
+            with metrics.timed("write"):
+                writers[letter].on_root(node)
+
+        def emit_node(letter, node, parent, depth, ord):
+            with metrics.timed("write"):
+                writers[letter].on_node(node, parent, depth, ord)
+
+        saved = []
+
+        def save(letter):
+            out = writers.pop(letter)
+            with metrics.timed("write"):
+                out.commit()
+            if letter in journals:
+                journals.pop(letter).keep(journal_path(manifest_dir, letter))
+            saved.append(letter)
+            progress.log("saved", f"✔ DONE — Saved {out.path}", letter=letter, path=out.path)
+
+        on_node = emit_node if output.FORMATS[fmt].per_node else None
+        progress.start(",".join(groups))
+        try:
+            if groups:
+                await engine.crawl_groups(groups, emit_root, save, max_in_flight, journals,
+                                          workers, on_node, previous, incremental == "subtrees",
+                                          client)
+        finally:
+            progress.stop()
+            for out in writers.values():
+                out.abort()
+            for j in journals.values():
+                j.close()
+    return saved
+
+def crawl(letters, out_dir=".", max_in_flight=engine.MAX_IN_FLIGHT,
+          journal_dir=JOURNAL_DIR, fresh=False, workers=0, fmt="json",
+          incremental=None, manifest_dir=MANIFEST_DIR):
+    # every finished letter's journal is kept in manifest_dir; incremental
+    # crawls against it (see engine.Run / engine.Frontier):
+    #   "subtrees": pages under an unchanged page are reused, not fetched
+    #   "pages"   : every page is fetched, only changed ones are parsed
+    # -> True when every letter was saved and no page was fetched twice
+    if incremental not in INCREMENTAL:
+        raise ValueError(f"incremental must be one of {INCREMENTAL}")
+    fetch.reset_counts()
+    engine.reset_reuse()
+    metrics.reset()
+    saved = asyncio.run(crawl_letters(letters, out_dir, max_in_flight, journal_dir, fresh,
+                                      workers, fmt, incremental, manifest_dir))
+
+    text = fetch.summary()
+    if incremental:
+        text += "\n" + engine.reuse_summary()
+    if metrics.METRICS["enabled"]:
+        text += "\n" + metrics.summary()
+    progress.log("summary", text, pages=len(fetch.fetch_counts()), **progress.counts(),
+                 metrics=metrics.snapshot() if metrics.METRICS["enabled"] else None)
+
+    # every page is memoized while its root is in flight (discover._index,
+    # engine.Run.pages); a refetch means two roots linked the same page
+    twice = fetch.refetched()
+    if twice:
+        progress.log("error", f"❌ {len(twice)} pages fetched more than once: "
+                              f"{', '.join(twice[:5])}", refetched=twice)
+    return len(saved) == len(letters) and not twice
@@ -0,0 +1,172 @@
+import os
+import sqlite3
+
+from .output import load_nodes, walk_tree
+from .parse import TEXT_LISTS
+
+# ---------------------------------------------------------
+# SQLITE STORE (icdscrape build-db)
+#
+# codes    : one row per distinct code (UNIQUE -> B-tree on code).
+#            parent is the nearest enclosing code: a page also links
+#            grandchildren (A92 lists A92.39 next to A92.3), so the same
+#            code can sit under several scraped parents.
+# edges    : every parent -> child link exactly as scraped, in order;
+#            roots have parent_id NULL. Enough to rebuild the JSON trees.
+# sections : one row per section list item.
+# search   : FTS5 over description, applicable_to, approximate_synonyms
+#            (list items joined by newlines), rowid = codes.id.
+# ---------------------------------------------------------
+DB_PATH = "icd10cm.sqlite"
+
+SEARCH_FIELDS = ("description", "applicable_to", "approximate_synonyms")
+
+SCHEMA = """
+CREATE TABLE codes (
+    id          INTEGER PRIMARY KEY,
+    code        TEXT NOT NULL UNIQUE,
+    letter      TEXT NOT NULL,
+    parent      TEXT,
+    description TEXT NOT NULL
+);
+CREATE INDEX codes_parent ON codes(parent);
+
+CREATE TABLE edges (
+    parent_id INTEGER REFERENCES codes(id),
+    child_id  INTEGER NOT NULL REFERENCES codes(id),
+    letter    TEXT NOT NULL,
+    ord       INTEGER NOT NULL
+);
+CREATE INDEX edges_parent ON edges(parent_id, ord);
+CREATE INDEX edges_child ON edges(child_id);
+
+CREATE TABLE sections (
+    code_id INTEGER NOT NULL REFERENCES codes(id),
+    section TEXT NOT NULL,
+    ord     INTEGER NOT NULL,
+    text    TEXT NOT NULL,
+    PRIMARY KEY (code_id, section, ord)
+) WITHOUT ROWID;
+
+CREATE VIRTUAL TABLE search USING fts5(
+    description, applicable_to, approximate_synonyms,
+    tokenize = 'porter unicode61'
+);
+"""
+
+# bm25 column weights: a hit in the description outranks a synonym
+RANK = "bm25(search, 10.0, 4.0, 4.0)"
+
+
+def letter_of(path):
+    return os.path.basename(path).split("_", 1)[0]
+
+# ---------------------------------------------------------
+# BUILD
+# ---------------------------------------------------------
+def build(paths, db_path=DB_PATH):
+    tmp = db_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    db = sqlite3.connect(tmp)
+    db.executescript(SCHEMA)
+
+    ids = {}
+    parents = {}
+    codes, edges, sections = [], [], []
+    order = {}                              # parent id -> next child ord
+
+    for path in paths:
+        letter = letter_of(path)
+        for root in load_nodes(path):
+            for node, parent, _ in walk_tree(root):
+                code = node.code
+                if code not in ids:
+                    ids[code] = len(ids) + 1
+                    codes.append((ids[code], code, letter, node.description))
+                    for key in TEXT_LISTS:
+                        for i, text in enumerate(getattr(node, key)):
+                            sections.append((ids[code], key, i, text))
+
+                # nearest enclosing parent = the longest code that links here
+                if parent and len(parent) > len(parents.get(code) or ""):
+                    parents[code] = parent
+
+                pid = ids[parent] if parent else None
+                order[pid] = n = order.get(pid, -1) + 1
+                edges.append((pid, ids[code], letter, n))
+
+    db.executemany(
+        "INSERT INTO codes (id, code, letter, parent, description) VALUES (?, ?, ?, ?, ?)",
+        [(i, code, letter, parents.get(code), desc) for i, code, letter, desc in codes],
+    )
+    db.executemany("INSERT INTO edges VALUES (?, ?, ?, ?)", edges)
+    db.executemany("INSERT INTO sections VALUES (?, ?, ?, ?)", sections)
+    db.execute("""
+        INSERT INTO search (rowid, description, applicable_to, approximate_synonyms)
+        SELECT c.id, c.description,
+               (SELECT group_concat(text, char(10)) FROM
+                   (SELECT text FROM sections WHERE code_id = c.id
+                    AND section = 'applicable_to' ORDER BY ord)),
+               (SELECT group_concat(text, char(10)) FROM
+                   (SELECT text FROM sections WHERE code_id = c.id
+                    AND section = 'approximate_synonyms' ORDER BY ord))
+        FROM codes c
+    """)
+    db.execute("INSERT INTO search (search) VALUES ('optimize')")
+    db.commit()
+    db.execute("ANALYZE")
+    db.close()
+
+    os.replace(tmp, db_path)
+    return len(codes), len(edges), len(sections)
+
+# ---------------------------------------------------------
+# QUERIES
+# ---------------------------------------------------------
+def connect(db_path=DB_PATH):
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"{db_path} not found; run icdscrape build-db first")
+    return sqlite3.connect(db_path)
+
+def lookup(db, code):
+    row = db.execute(
+        "SELECT id, code, letter, parent, description FROM codes WHERE code = ?", (code,)
+    ).fetchone()
+    if row is None:
+        return None
+
+    cid, code, letter, parent, description = row
+    node = {"code": code, "letter": letter, "parent": parent, "description": description}
+    for key in TEXT_LISTS:
+        node[key] = []
+    for section, text in db.execute(
+        "SELECT section, text FROM sections WHERE code_id = ? ORDER BY section, ord", (cid,)
+    ):
+        node[section].append(text)
+    node["children"] = [c for (c,) in db.execute(
+        "SELECT code FROM codes WHERE parent = ? ORDER BY code", (code,)
+    )]
+    return node
+
+def fts_query(text):
+    # plain words -> every word must match (quoted, so "-" or ":" are safe)
+    return " ".join('"' + w.replace('"', '""') + '"' for w in text.split())
+
+def search(db, text, limit=20, field=None, raw=False):
+    if not text.strip():
+        raise ValueError("empty search query")
+    query = text if raw else fts_query(text)
+    if field:
+        query = f"{field} : ({query})"
+    try:
+        return db.execute(
+            f"""SELECT c.code, c.description FROM search
+                JOIN codes c ON c.id = search.rowid
+                WHERE search MATCH ? ORDER BY {RANK} LIMIT ?""",
+            (query, limit),
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        # only the MATCH expression can fail here: bad --raw FTS5 syntax
+        raise ValueError(f"bad search query {text!r}: {e}") from None
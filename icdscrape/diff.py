@@ -0,0 +1,157 @@
+import filecmp
+import glob
+import json
+import os
+
+from .index import DEFAULT_FILES, CodeIndex
+from .output import load_nodes
+from .parse import TEXT_LISTS
+
+# ---------------------------------------------------------
+# CHANGESET BETWEEN TWO CRAWLS (icdscrape diff)
+#
+# Files are paired by name (A_Applicable_Approximate.json in both runs)
+# and diffed one pair at a time, so memory holds one letter's two
+# CodeIndexes, never the A-Z set. Byte-identical pairs are skipped
+# without parsing. Within a pair every code is one hash lookup into the
+# other side's index; "parent" is the index's nearest enclosing code.
+#
+# One record per change, in an order a consumer can apply top to bottom:
+#   {"op": "add", "file", "code", "parent", "description", <section lists>}
+#   {"op": "move", "file", "code", "from", "to"}
+#   {"op": "description", "file", "code", "old", "new"}
+#   {"op": "section", "file", "code", "section", "added", "removed", "items"}
+#   {"op": "remove", "file", "code", "parent"}
+# Adds, moves and edits follow the new tree in pre-order (a parent is
+# always in place before its children); removes come after every file,
+# deepest first. "items" is the section's full new list; "added" /
+# "removed" are the entries that appeared / went away.
+#
+# A code that left one file for another is an add in its new file and a
+# remove in its old one; the remove carries "moved_to": <new file>, so a
+# cache keyed by code keeps the added record.
+# ---------------------------------------------------------
+OPS = ("add", "move", "description", "section", "remove")
+
+
+def pairs(old, new):
+    # (name, old path or None, new path or None); old/new: two files or two folders
+    for path in (old, new):
+        if not os.path.exists(path):
+            raise ValueError(f"{path} not found")
+    if os.path.isfile(old) != os.path.isfile(new):
+        raise ValueError("diff two files or two folders, not a file and a folder")
+    if os.path.isfile(old):
+        return [(os.path.basename(new), old, new)]
+
+    a = {os.path.basename(p): p for p in glob.glob(os.path.join(old, DEFAULT_FILES))}
+    b = {os.path.basename(p): p for p in glob.glob(os.path.join(new, DEFAULT_FILES))}
+    return [(name, a.get(name), b.get(name)) for name in sorted(a.keys() | b.keys())]
+
+def _index(path):
+    return CodeIndex([load_nodes(path)] if path else [])
+
+def _parent(ix, i):
+    p = ix.parent[i]
+    return ix.codes[p] if p >= 0 else None
+
+def diff_files(name, old_path, new_path):
+    old, new = _index(old_path), _index(new_path)
+
+    for i, code in enumerate(new.codes):
+        parent = _parent(new, i)
+        sections = new.sections[i]
+        j = old.pos.get(code)
+        if j is None:
+            rec = {"op": "add", "file": name, "code": code, "parent": parent,
+                   "description": new.descriptions[i]}
+            for key, items in zip(TEXT_LISTS, sections):
+                rec[key] = list(items)
+            yield rec
+            continue
+
+        was = _parent(old, j)
+        if was != parent:
+            yield {"op": "move", "file": name, "code": code, "from": was, "to": parent}
+        if old.descriptions[j] != new.descriptions[i]:
+            yield {"op": "description", "file": name, "code": code,
+                   "old": old.descriptions[j], "new": new.descriptions[i]}
+        if old.sections[j] != sections:
+            for key, before, after in zip(TEXT_LISTS, old.sections[j], sections):
+                if before != after:
+                    gone, kept = set(before), set(after)
+                    yield {"op": "section", "file": name, "code": code, "section": key,
+                           "added": [t for t in after if t not in gone],
+                           "removed": [t for t in before if t not in kept],
+                           "items": list(after)}
+
+    for j in range(len(old) - 1, -1, -1):
+        code = old.codes[j]
+        if code not in new.pos:
+            yield {"op": "remove", "file": name, "code": code, "parent": _parent(old, j)}
+
+def diff(old, new, skipped=None):
+    # every change between two runs, file by file; skipped (a list) collects
+    # the names of byte-identical pairs
+    added = {}                  # code -> file it was added to
+    removes = []
+    for name, a, b in pairs(old, new):
+        if a and b and filecmp.cmp(a, b, shallow=False):
+            if skipped is not None:
+                skipped.append(name)
+            continue
+        for rec in diff_files(name, a, b):
+            if rec["op"] == "remove":
+                removes.append(rec)
+                continue
+            if rec["op"] == "add":
+                added[rec["code"]] = name
+            yield rec
+
+    for rec in removes:
+        if rec["code"] in added:
+            rec["moved_to"] = added[rec["code"]]
+        yield rec
+
+def write(changes, f):
+    # one compact JSON line per record; -> {op: count}
+    ops = dict.fromkeys(OPS, 0)
+    for rec in changes:
+        ops[rec["op"]] += 1
+        f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+    return ops
+
+# ---------------------------------------------------------
+# APPLY (what a downstream cache does with the changeset)
+# codes: {code: {"parent", "description", <section lists>}} over every
+# file the changeset covers, e.g. from flat_codes(); updated in place
+# ---------------------------------------------------------
+def flat_codes(*paths):
+    codes = {}
+    for path in paths:
+        ix = _index(path)
+        for i, code in enumerate(ix.codes):
+            rec = {"parent": _parent(ix, i), "description": ix.descriptions[i]}
+            for key, items in zip(TEXT_LISTS, ix.sections[i]):
+                rec[key] = list(items)
+            codes[code] = rec
+    return codes
+
+def apply(codes, changes):
+    for rec in changes:
+        op, code = rec["op"], rec["code"]
+        if op == "add":
+            codes[code] = {key: value for key, value in rec.items()
+                           if key not in ("op", "file", "code")}
+        elif op == "move":
+            codes[code]["parent"] = rec["to"]
+        elif op == "description":
+            codes[code]["description"] = rec["new"]
+        elif op == "section":
+            codes[code][rec["section"]] = list(rec["items"])
+        elif op == "remove":
+            if "moved_to" not in rec:
+                del codes[code]
+        else:
+            raise ValueError(f"unknown changeset op: {op}")
+    return codes
@@ -0,0 +1,117 @@
+import asyncio
+import re
+from collections import namedtuple
+
+from . import dom, engine, fetch
+from .letters import LETTERS
+from .parse import BASE_URL, clean
+
+# ---------------------------------------------------------
+# PAGE INDEX (memoized per URL)
+# Chapter and range pages are shared between letters (A/B, C/D, S/T,
+# V/W/X/Y), so each one is fetched and parsed once per run and every
+# letter filters the same pre-extracted lists. Like parse.scrape_html,
+# only the lists outlive the DOM.
+#
+# links : [(href, text)] for every <a href> in body-content
+# codes : [(code, href)] for every <li><a> in ul.codeHierarchy
+# ---------------------------------------------------------
+PageIndex = namedtuple("PageIndex", "links codes")
+
+EMPTY = PageIndex((), ())
+
+_index = {}
+_failed = set()     # gave up on these this run; not fetched again until reset()
+
+def index_html(html):
+    b = dom.backend()
+    doc = b.parse(html)
+    try:
+        return index_doc(b, doc)
+    finally:
+        b.release(doc)
+
+def index_doc(b, doc):
+    body = b.first(doc, "div", "body-content")
+    if body is None:
+        return EMPTY
+
+    links = []
+    for a in b.find_all(body, "a"):
+        href = b.attr(a, "href")
+        if href is not None:
+            links.append((href, clean(b.text(a) or "")))
+
+    codes = []
+    ul = b.first(body, "ul", "codeHierarchy")
+    if ul is not None:
+        for li in b.find_all(ul, "li"):
+            t = clean(b.text(li) or "")
+            if not t:
+                continue
+            a = next(iter(b.find_all(li, "a")), None)
+            if a is not None:
+                codes.append((t.split(" ")[0], b.attr(a, "href")))
+
+    return PageIndex(tuple(links), tuple(codes))
+
+async def load(client, limit, urls):
+    missing = [u for u in dict.fromkeys(urls) if u not in _index and u not in _failed]
+    pages = await asyncio.gather(*[fetch.aget_html(client, limit, u) for u in missing])
+    for url, html in zip(missing, pages):
+        if html is None:
+            _failed.add(url)
+        else:
+            _index[url] = index_html(html)
+
+def indexed(urls):
+    return [_index.get(u, EMPTY) for u in urls]
+
+def reset():
+    _index.clear()
+    _failed.clear()
+
+# ---------------------------------------------------------
+# PER-LETTER FILTERS
+# ---------------------------------------------------------
+def chapter_urls(cfg):
+    return [f"{BASE_URL}/ICD10CM/Codes/{ch}" for ch in cfg.chapters]
+
+def ranges_for(cfg):
+    if cfg.scope is None:
+        return chapter_urls(cfg)
+
+    ranges = set()
+    for page in indexed(chapter_urls(cfg)):
+        for href, txt in page.links:
+            if cfg.scope not in href:
+                continue
+            if re.search(cfg.href, href) or (cfg.text and re.search(cfg.text, txt)):
+                ranges.add(BASE_URL + href)
+    return sorted(ranges)
+
+def roots_for(cfg, range_urls):
+    roots = set()
+    for page in indexed(range_urls):
+        for code, href in page.codes:
+            if re.search(cfg.roots, code):
+                roots.add((code, BASE_URL + href))
+    return sorted(roots)
+
+# ---------------------------------------------------------
+# DISCOVERY STAGE: {letter: (range_urls, root_codes)}
+# Runs on the crawl's own client and event loop; the page index starts
+# empty for every crawl.
+# ---------------------------------------------------------
+async def discover(client, letters, max_in_flight=engine.MAX_IN_FLIGHT):
+    reset()
+    cfgs = [LETTERS[letter] for letter in letters]
+    limit = asyncio.Semaphore(max_in_flight)
+
+    # every distinct chapter page, then every distinct range page, in one go
+    await load(client, limit, [u for cfg in cfgs for u in chapter_urls(cfg)])
+    ranges = {cfg.letter: ranges_for(cfg) for cfg in cfgs}
+    await load(client, limit, [u for urls in ranges.values() for u in urls])
+
+    return {cfg.letter: (ranges[cfg.letter], roots_for(cfg, ranges[cfg.letter]))
+            for cfg in cfgs}
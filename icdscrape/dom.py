@@ -0,0 +1,191 @@
+from bs4 import BeautifulSoup, Tag
+
+# ---------------------------------------------------------
+# PARSER BACKENDS
+# The extractors in parse.py only need a handful of DOM operations; each
+# backend implements exactly those, with BeautifulSoup's semantics:
+#
+# parse(html)          -> document
+# first(root, tag, cls)-> first descendant <tag class="... cls ..."> or None
+# find_all(root, tag)  -> descendant <tag> elements in document order
+# elements(root)       -> every descendant element in document order
+# tag(el), text(el), attr(el, name)
+# release(doc)         -> free the document now, not at the next GC pass
+#
+# text() skips <script>/<style> contents like get_text() does.
+# lxml and selectolax are optional and only imported when selected.
+# ---------------------------------------------------------
+SKIP_TEXT = ("script", "style")
+
+
+class SoupBackend:
+    name = "bs4"
+    features = "html.parser"
+
+    def parse(self, html):
+        return BeautifulSoup(html, self.features)
+
+    def first(self, root, tag, cls):
+        return root.find(tag, class_=cls)
+
+    def find_all(self, root, tag):
+        return root.find_all(tag)
+
+    def elements(self, root):
+        return (el for el in root.descendants if isinstance(el, Tag))
+
+    def tag(self, el):
+        return el.name
+
+    def text(self, el):
+        return el.get_text()
+
+    def attr(self, el, name):
+        return el.get(name)
+
+    def release(self, doc):
+        # a soup is a web of parent/sibling cycles; refcounting alone
+        # never frees it. The soup object's own decompose() stops at the
+        # root (it has no next_element), so take the children apart too
+        for el in list(doc.contents):
+            el.decompose()
+        doc.decompose()
+
+
+class SoupLxmlBackend(SoupBackend):
+    name = "bs4-lxml"
+    features = "lxml"
+
+    def __init__(self):
+        import lxml  # noqa: F401  (fail at selection time, not first page)
+
+
+class LxmlBackend:
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.etree
+        import lxml.html
+        self._parse = lxml.html.document_fromstring
+        # bytes, so a str page that opens with <?xml encoding=...?> parses too
+        self._parser = lxml.html.HTMLParser(encoding="utf-8")
+        self._empty = lxml.etree.ParserError
+
+    def parse(self, html):
+        try:
+            return self._parse(html.encode("utf-8"), parser=self._parser)
+        except self._empty:
+            # blank or comment-only body: an empty page, as the other backends give
+            return self._parse(b"<html></html>", parser=self._parser)
+
+    def first(self, root, tag, cls):
+        for el in root.iterdescendants(tag):
+            if cls in (el.get("class") or "").split():
+                return el
+        return None
+
+    def find_all(self, root, tag):
+        return list(root.iterdescendants(tag))
+
+    def elements(self, root):
+        return (el for el in root.iterdescendants() if isinstance(el.tag, str))
+
+    def tag(self, el):
+        return el.tag
+
+    def text(self, el):
+        if next(el.iterdescendants(*SKIP_TEXT), None) is None:
+            return el.text_content()
+        parts = []
+        for node in el.iter():
+            if isinstance(node.tag, str) and node.tag not in SKIP_TEXT and node.text:
+                parts.append(node.text)
+            if node is not el and node.tail:
+                parts.append(node.tail)
+        return "".join(parts)
+
+    def attr(self, el, name):
+        return el.get(name)
+
+    def release(self, doc):
+        pass                    # C tree, freed with its last reference
+
+
+class SelectolaxBackend:
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parse = LexborHTMLParser
+
+    def parse(self, html):
+        return self._parse(html).root
+
+    def first(self, root, tag, cls):
+        for el in root.css(f"{tag}.{cls}"):
+            if el != root:
+                return el
+        return None
+
+    def find_all(self, root, tag):
+        return [el for el in root.css(tag) if el != root]
+
+    def elements(self, root):
+        it = root.traverse(include_text=False)
+        next(it, None)          # traverse() starts with root itself
+        return (el for el in it if el.tag[0] not in "-_")
+
+    def tag(self, el):
+        return el.tag
+
+    def text(self, el):
+        if el.css_first(", ".join(SKIP_TEXT)) is None:
+            return el.text(deep=True, separator="", strip=False)
+        parts = []
+        for node in el.traverse(include_text=True):
+            if node.tag == "-text" and node.parent.tag not in SKIP_TEXT:
+                parts.append(node.text_content)
+        return "".join(parts)
+
+    def attr(self, el, name):
+        return el.attributes.get(name)
+
+    def release(self, doc):
+        pass
+
+
+BACKENDS = {
+    "bs4": SoupBackend,
+    "bs4-lxml": SoupLxmlBackend,
+    "lxml": LxmlBackend,
+    "selectolax": SelectolaxBackend,
+}
+
+_current = SoupBackend()
+
+# ---------------------------------------------------------
+# SELECTION
+# ---------------------------------------------------------
+def use(name):
+    global _current
+    if name not in BACKENDS:
+        raise ValueError(f"unknown parser backend: {name}")
+    if _current.name != name:
+        _current = BACKENDS[name]()
+    return _current
+
+def backend():
+    return _current
+
+def available():
+    names = []
+    for name, cls in BACKENDS.items():
+        try:
+            cls()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+def parse(html):
+    return _current.parse(html)
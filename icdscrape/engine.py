@@ -0,0 +1,328 @@
+import asyncio
+import hashlib
+from collections import Counter, namedtuple
+from itertools import count
+from urllib.parse import urljoin
+
+from . import fetch, metrics, progress
+from .node import CodeNode
+from .parse import intern_page, scrape_html
+from .pipeline import ParsePool
+
+# At most this many requests are on the wire at once; the rest of the
+# tree waits on the semaphore instead of piling up sockets.
+MAX_IN_FLIGHT = 8
+
+# what incremental runs did with known pages (see Run._load)
+_reuse = Counter()
+
+# ---------------------------------------------------------
+# FETCH + PARSE ONE PAGE -> (parse.Page, body hash); the DOM is already
+# released. Without a parser pool the page is parsed on the event loop.
+# With one, the HTML goes to a worker process, and the fetch itself waits
+# for a pool slot first so fetching never runs far ahead of parsing.
+# known: (hash, Page) from the previous run; an identical body (a 304
+# from the page cache included) gets that record back unparsed.
+# ---------------------------------------------------------
+def body_hash(html):
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+async def scrape_page(client, limit, url, code, parser=None, known=None):
+    if parser is None:
+        html = await fetch.aget_html(client, limit, url)
+        if html is None:
+            return None, None
+        digest = body_hash(html)
+        if known and known[0] == digest:
+            return known[1], digest
+        return scrape_html(html, code), digest
+
+    async with parser.slots:
+        html = await fetch.aget_html(client, limit, url)
+        if html is None:
+            return None, None
+        digest = body_hash(html)
+        if known and known[0] == digest:
+            return known[1], digest
+        return await parser.parse(code, html), digest
+
+# ---------------------------------------------------------
+# ONE RUN: client, in-flight limit, parser pool and page memo
+# Every URL is fetched and parsed at most once per run; a second request
+# for it (even while the first is still in flight) gets the first
+# result, with its description and links exactly as first parsed.
+# The memo keeps page records; each place a code sits in the tree gets
+# its own CodeNode sharing that record's strings. A page only links codes
+# under its own root, so the Frontier forgets a root's URLs once that
+# root is emitted and the memo stays as small as the roots in flight.
+#
+# Incremental runs pass the letter's Manifest as `previous`. A trusted
+# page (its parent's body was unchanged) is taken from the manifest
+# without a request; any other known page is fetched and only re-parsed
+# if its body hash changed.
+# ---------------------------------------------------------
+class Run:
+
+    def __init__(self, client, limit, parser=None):
+        self.client = client
+        self.limit = limit
+        self.parser = parser
+        self.pages = {}         # url -> task resolving to (Page, unchanged) or None
+
+    async def _load(self, url, code, journal, previous, trusted):
+        known = previous.known(url) if previous else None
+        page = journal.get(url) if journal else None
+        if page is not None:
+            digest = journal.digest(url)
+        else:
+            if trusted and known:
+                digest, page = known
+                _reuse["reused"] += 1
+            else:
+                page, digest = await scrape_page(self.client, self.limit, url, code,
+                                                 self.parser, known)
+                if previous and page:
+                    _reuse["new" if not known else
+                           "unchanged" if digest == known[0] else "changed"] += 1
+            if page and journal:
+                with metrics.timed("journal"):
+                    journal.add(url, page, digest)
+
+        if page is None:
+            return None
+        # pages from worker processes or the journal arrive as fresh copies
+        return intern_page(page), known is not None and digest == known[0]
+
+    def forget(self, urls):
+        for url in urls:
+            self.pages.pop(url, None)
+
+    async def page(self, url, code, journal=None, previous=None, trusted=False):
+        # -> (CodeNode, child links, body unchanged since the previous run)
+        task = self.pages.get(url)
+        if task is None:
+            task = self.pages[url] = asyncio.ensure_future(
+                self._load(url, code, journal, previous, trusted))
+
+        loaded = await task
+        if loaded is None:
+            return None
+        page, unchanged = loaded
+        return CodeNode.from_page(page), page.links, unchanged
+
+# ---------------------------------------------------------
+# FRONTIER (work queue + tree reassembly)
+#
+# Every page is a Task(id, url, code, parent, depth, ord, root, group,
+# trusted) on one priority queue shared by a fixed set of worker
+# coroutines. A worker scrapes the page, keeps only its CodeNode (the DOM
+# is already gone), and queues the children (links resolved against the
+# page's own URL, so any host works) with parent = its own id. Nothing
+# recurses and no page waits on its subtree.
+#
+# Incremental runs with trust=True queue the children of a page whose
+# body is unchanged as trusted: the whole subtree below comes from the
+# manifest, so only changed pages and their direct children are fetched.
+# A change that shows only on a page below an unchanged one (its own
+# sections) is not seen; trust=False fetches every page instead and
+# still skips parsing the unchanged ones.
+#
+# Priority is (root id, depth, id): earlier roots first, level by level
+# within a root, so siblings still run in parallel while roots finish
+# roughly in order. Once a root has nothing left in flight its tree is
+# linked together from the recorded child ids, handed to on_root in root
+# order, and its bookkeeping (and its pages in the Run memo) dropped.
+# ---------------------------------------------------------
+Task = namedtuple("Task", "id url code parent depth ord root group trusted")
+
+
+class Frontier:
+
+    def __init__(self, run, on_root, on_done, on_node=None, journals=None, previous=None,
+                 trust=True):
+        self.run = run
+        self.on_root = on_root
+        self.on_done = on_done
+        self.on_node = on_node
+        self.journals = journals or {}
+        self.previous = previous or {}      # group -> Manifest (incremental runs)
+        self.trust = trust
+
+        self.queue = asyncio.PriorityQueue()
+        self.ids = count()
+        self.nodes = {}         # id -> CodeNode, or None if the page failed
+        self.kids = {}          # id -> child ids in link order
+        self.pending = {}       # root id -> its pages queued or in flight
+        self.urls = {}          # root id -> URLs it asked the run for
+        self.roots = {}         # group -> root ids in root order
+        self.emitted = {}       # group -> roots already handed to on_root
+
+    def add(self, url, code, parent, depth, ord, root, group, trusted=False):
+        # ord: position among the parent's links (or the group's roots)
+        tid = next(self.ids)
+        if root is None:
+            root = tid
+        self.pending[root] = self.pending.get(root, 0) + 1
+        progress.found()
+        task = Task(tid, url, code, parent, depth, ord, root, group, trusted)
+        self.queue.put_nowait(((root, depth, tid), task))
+        return tid
+
+    def add_group(self, group, roots):
+        self.roots[group] = [self.add(url, code, None, 0, i, None, group)
+                             for i, (code, url) in enumerate(roots)]
+        self.emitted[group] = 0
+        if not roots:
+            self.on_done(group)
+
+    # -----------------------------------------------------
+    # WORKERS
+    # -----------------------------------------------------
+    async def visit(self, t):
+        self.urls.setdefault(t.root, []).append(t.url)
+        page = await self.run.page(t.url, t.code, self.journals.get(t.group),
+                                   self.previous.get(t.group), t.trusted)
+        node = None
+        if page:
+            node, links, unchanged = page
+            if self.on_node:
+                parent = self.nodes[t.parent].code if t.parent is not None else None
+                self.on_node(t.group, node, parent, t.depth, t.ord)
+
+            kids = self.kids[t.id] = []
+            for i, (c_code, href) in enumerate(links):
+                kids.append(self.add(urljoin(t.url, href), c_code, t.id, t.depth + 1, i,
+                                     t.root, t.group, unchanged and self.trust))
+
+        self.nodes[t.id] = node
+        progress.visited(node is not None)
+        self.pending[t.root] -= 1
+        if not self.pending[t.root]:
+            self.flush(t.group)
+
+    async def worker(self):
+        while True:
+            _, task = await self.queue.get()
+            try:
+                await self.visit(task)
+            finally:
+                self.queue.task_done()
+
+    async def drain(self, workers):
+        tasks = [asyncio.ensure_future(self.worker()) for _ in range(workers)]
+        done = asyncio.ensure_future(self.queue.join())
+        try:
+            finished, _ = await asyncio.wait([done, *tasks], return_when=asyncio.FIRST_COMPLETED)
+            for t in finished:
+                if t is not done:
+                    t.result()          # a worker died: re-raise its error
+        finally:
+            done.cancel()
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(done, *tasks, return_exceptions=True)
+
+    # -----------------------------------------------------
+    # REASSEMBLY
+    # -----------------------------------------------------
+    def assemble(self, root):
+        # breadth-first list of the subtree's ids, then link each node to
+        # its children and forget them
+        order = [root]
+        for tid in order:
+            order.extend(self.kids.get(tid, ()))
+
+        for tid in order:
+            node = self.nodes[tid]
+            if node is not None:
+                for kid in self.kids.get(tid, ()):
+                    child = self.nodes[kid]
+                    if child is not None:
+                        node.add_child(child)
+
+        top = self.nodes[root]
+        for tid in order:
+            del self.nodes[tid]
+            self.kids.pop(tid, None)
+        del self.pending[root]
+        self.run.forget(self.urls.pop(root, ()))
+        return top
+
+    def flush(self, group):
+        roots = self.roots[group]
+        i = self.emitted[group]
+        while i < len(roots) and not self.pending.get(roots[i]):
+            node = self.assemble(roots[i])
+            if node is not None:
+                self.on_root(group, node)
+            i += 1
+        self.emitted[group] = i
+        if i == len(roots):
+            self.on_done(group)
+
+# ---------------------------------------------------------
+# CRAWL
+# ---------------------------------------------------------
+async def crawl_groups(groups, on_root, on_done, max_in_flight=MAX_IN_FLIGHT,
+                       journals=None, workers=0, on_node=None, previous=None, trust=True,
+                       client=None):
+    # groups: {name: [(code, url), ...]}; every group shares one client,
+    # one in-flight limit and one parser pool (workers=0: parse in-process).
+    # on_node(name, node, parent, depth, ord) sees each page as it is parsed,
+    # on_root(name, node) gets each finished root subtree in root order,
+    # on_done(name) fires once a group's last root is through;
+    # previous: {name: journal.Manifest} makes the run incremental, and
+    # trust reuses whole subtrees under unchanged pages (see Frontier);
+    # client: an open fetch.client() to crawl on (default: a new one)
+    if client is None:
+        async with fetch.client() as client:
+            return await crawl_groups(groups, on_root, on_done, max_in_flight, journals,
+                                      workers, on_node, previous, trust, client)
+
+    limit = asyncio.Semaphore(max_in_flight)
+    parser = ParsePool(workers) if workers else None
+
+    try:
+        frontier = Frontier(Run(client, limit, parser), on_root, on_done, on_node, journals,
+                            previous, trust)
+        for name, roots in groups.items():
+            frontier.add_group(name, roots)
+
+        # enough workers to keep every request slot and parser slot busy
+        await frontier.drain(max_in_flight + (parser.max_pending if parser else 0))
+    finally:
+        if parser:
+            parser.close()
+
+async def crawl_roots(roots, max_in_flight=MAX_IN_FLIGHT, journal=None):
+    nodes = []
+    await crawl_groups({None: roots}, lambda _, node: nodes.append(node), lambda _: None,
+                       max_in_flight, {None: journal} if journal else None)
+    return nodes
+
+# ---------------------------------------------------------
+# BLOCKING API (same tree as the old recursive scrape_code, as CodeNodes;
+# .to_dict() gives the old dict; roots whose page failed are left out)
+# ---------------------------------------------------------
+def scrape_code(url, code, max_in_flight=MAX_IN_FLIGHT):
+    nodes = asyncio.run(crawl_roots([(code, url)], max_in_flight))
+    return nodes[0] if nodes else None
+
+def scrape_codes(roots, max_in_flight=MAX_IN_FLIGHT):
+    return asyncio.run(crawl_roots(roots, max_in_flight))
+
+def scrape_groups(groups, on_root, on_done, max_in_flight=MAX_IN_FLIGHT,
+                  journals=None, workers=0, on_node=None, previous=None, trust=True):
+    asyncio.run(crawl_groups(groups, on_root, on_done, max_in_flight, journals, workers,
+                             on_node, previous, trust))
+
+# ---------------------------------------------------------
+# INCREMENTAL REPORT
+# ---------------------------------------------------------
+def reset_reuse():
+    _reuse.clear()
+
+def reuse_summary():
+    return (f"INCREMENTAL: {_reuse['reused']} pages reused without a request, "
+            f"{_reuse['unchanged']} unchanged (not re-parsed), "
+            f"{_reuse['changed']} changed, {_reuse['new']} new")
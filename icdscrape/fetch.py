@@ -0,0 +1,299 @@
+import asyncio
+import os
+import time
+from collections import Counter
+from email.message import Message
+
+import aiohttp
+
+from . import metrics
+from .archive import ArchiveReader, ArchiveWriter
+from .cache import PageCache
+from .ratelimit import THROTTLED, RateLimiter
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                  "AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# Every page lives on www.icd10data.com, so one warm pool of keep-alive
+# connections serves the whole run instead of a TCP+TLS handshake per page.
+POOL = {
+    "pool_size": 10,     # connections kept open across all hosts
+    "per_host": 8,       # connections open to any one host
+    "keepalive": True,
+}
+
+# ICD-10-CM changes once a year, so pages are kept on disk and revalidated
+# with If-None-Match / If-Modified-Since instead of downloaded again.
+CACHE = {
+    "cache": True,
+    "cache_path": os.path.join(".icdcache", "pages.sqlite"),
+    "cache_ttl": None,              # seconds; None keeps pages until evicted by size
+    "cache_max_bytes": 1 << 30,
+    "cache_only": False,            # serve only what is cached, never hit the network
+}
+
+# Politeness: one token bucket paces every request of the run, slowing
+# down on 429/503 or rising latency and speeding back up when healthy.
+RATE = {
+    "rate": 8.0,         # requests/s to start at
+    "burst": 8,          # one token per in-flight slot
+    "min_rate": 0.5,
+    "max_rate": 32.0,    # what 8 in-flight requests with a 0.25 s sleep allowed
+    "adaptive": True,
+}
+
+# Offline runs: --record appends every response to a WARC page archive,
+# --replay serves every fetch from one (no network, cache or rate limit).
+ARCHIVE = {
+    "record": None,      # archive path
+    "replay": None,
+}
+
+_cache = None
+_limiter = None
+_archive = None
+
+# counted through aiohttp tracing
+_async_counts = {"requests": 0, "connections": 0}
+
+# page fetches per URL this run (one per aget_html call, retries included)
+_fetches = Counter()
+
+# seconds per HTTP request this run, retries included
+_latencies = []
+
+# ---------------------------------------------------------
+# CONFIG
+# ---------------------------------------------------------
+def configure(**options):
+    for key, value in options.items():
+        if key in POOL:
+            POOL[key] = value
+        elif key in CACHE:
+            CACHE[key] = value
+        elif key in RATE:
+            RATE[key] = value
+        elif key in ARCHIVE:
+            ARCHIVE[key] = value
+        else:
+            raise TypeError(f"unknown fetch option: {key}")
+    close()
+
+def close():
+    global _cache, _limiter, _archive
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+    if _archive is not None:
+        _archive.close()
+        _archive = None
+    _limiter = None
+
+def limiter():
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter(**RATE)
+    return _limiter
+
+# ---------------------------------------------------------
+# PAGE CACHE
+# ---------------------------------------------------------
+def page_cache():
+    global _cache
+    if _cache is None and (CACHE["cache"] or CACHE["cache_only"]):
+        _cache = PageCache(
+            CACHE["cache_path"],
+            ttl=CACHE["cache_ttl"],
+            max_bytes=CACHE["cache_max_bytes"],
+            cache_only=CACHE["cache_only"],
+        )
+    return _cache
+
+def _lookup(url):
+    cache = page_cache()
+    entry = cache.get(url) if cache else None
+    if entry and cache.cache_only:
+        cache.hits += 1
+        metrics.count("cache_hits")
+    return cache, entry
+
+def _remember(cache, entry, url, status, text, headers):
+    if status == 304 and entry:
+        cache.mark_validated(url, headers)
+        return entry.body
+    if status == 200:
+        if cache:
+            cache.put(url, text, headers)
+        return text
+    return None
+
+# ---------------------------------------------------------
+# PAGE ARCHIVE
+# ---------------------------------------------------------
+def archive():
+    global _archive
+    if _archive is None:
+        if ARCHIVE["replay"]:
+            _archive = ArchiveReader(ARCHIVE["replay"])
+        elif ARCHIVE["record"]:
+            _archive = ArchiveWriter(ARCHIVE["record"])
+    return _archive
+
+def _replay(url):
+    metrics.count("archive_replayed")
+    response = archive().get(url)
+    if response is None or response.status != 200:
+        return None
+    return _decode(response.headers, response.body)
+
+def _validators(entry):
+    # a recorded 304 has no body to replay, so recording always asks for
+    # the full page
+    if entry is None or ARCHIVE["record"]:
+        return {}
+    return entry.conditional_headers()
+
+# ---------------------------------------------------------
+# PER-REQUEST ACCOUNTING
+# ---------------------------------------------------------
+def _attempt(retry):
+    metrics.count("http_requests")
+    if retry:
+        metrics.count("http_retries")
+
+def _tally(status, elapsed, size):
+    _latencies.append(elapsed)
+    metrics.observe("fetch", elapsed)
+    metrics.count("http_bytes", size)
+    if status in THROTTLED:
+        metrics.count("http_throttled")
+    elif status == 304:
+        metrics.count("cache_revalidated")
+
+def _failed():
+    metrics.count("http_errors")
+
+# ---------------------------------------------------------
+# POOLED CLIENT
+# ---------------------------------------------------------
+async def _on_request_start(_client, ctx, params):
+    _async_counts["requests"] += 1
+
+async def _on_connection_create_end(_client, ctx, params):
+    _async_counts["connections"] += 1
+
+def client():
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(_on_request_start)
+    trace.on_connection_create_end.append(_on_connection_create_end)
+    connector = aiohttp.TCPConnector(
+        limit=POOL["pool_size"],
+        limit_per_host=POOL["per_host"],
+        force_close=not POOL["keepalive"],
+    )
+    headers = dict(HEADERS)
+    if not POOL["keepalive"]:
+        headers["Connection"] = "close"
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=headers,
+        timeout=aiohttp.ClientTimeout(sock_connect=10, sock_read=10),
+        trace_configs=[trace],
+    )
+
+def _decode(headers, body):
+    # the Content-Type charset (default UTF-8) of a live or replayed response;
+    # a bad byte or an unknown charset never fails the page
+    msg = Message()
+    for key, value in headers.items():
+        if key.lower() == "content-type":
+            msg["Content-Type"] = value
+    try:
+        return body.decode(msg.get_content_charset() or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+async def aget_html(client, limit, url):
+    _fetches[url] += 1
+    if ARCHIVE["replay"]:
+        return _replay(url)
+    cache, entry = _lookup(url)
+    if cache and cache.cache_only:
+        return entry.body if entry else None
+
+    headers = _validators(entry)
+    recorder = archive()
+    pace = limiter()
+    for attempt in range(3):
+        try:
+            async with limit:
+                await pace.await_token()
+                _attempt(attempt)
+                t = time.monotonic()
+                metrics.gauge("http_in_flight", 1)
+                try:
+                    async with client.get(url, headers=headers) as r:
+                        body = await r.read()
+                        text = _decode(r.headers, body) if r.status == 200 else None
+                        elapsed = time.monotonic() - t
+                        _tally(r.status, elapsed, len(body))
+                        pace.record(r.status, elapsed, r.headers)
+                        if recorder:
+                            recorder.add(url, r.status, r.headers, body)
+                        html = _remember(cache, entry, url, r.status, text, r.headers)
+                finally:
+                    metrics.gauge("http_in_flight", -1)
+            if html is not None:
+                return html
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            _failed()
+            pace.error()
+    return None
+
+# ---------------------------------------------------------
+# FETCH COUNTS
+# ---------------------------------------------------------
+def fetch_counts():
+    return _fetches
+
+def latencies():
+    return _latencies
+
+def refetched():
+    return sorted(url for url, n in _fetches.items() if n > 1)
+
+def reset_counts():
+    _fetches.clear()
+    _latencies.clear()
+
+# ---------------------------------------------------------
+# CONNECTION REUSE + CACHE REPORT
+# ---------------------------------------------------------
+def reuse_stats():
+    reqs = _async_counts["requests"]
+    conns = _async_counts["connections"]
+    reused = max(reqs - conns, 0)
+    return {
+        "requests": reqs,
+        "connections": conns,
+        "reuse_ratio": reused / reqs if reqs else 0.0,
+    }
+
+def reuse_summary():
+    s = reuse_stats()
+    return (f"HTTP: {s['requests']} requests over {s['connections']} connections "
+            f"({s['reuse_ratio']:.1%} reused)")
+
+def summary():
+    lines = [reuse_summary(),
+             f"Pages: {len(_fetches)} URLs fetched, {len(refetched())} more than once"]
+    if _limiter is not None:
+        lines.append(_limiter.summary())
+    if _cache is not None:
+        lines.append(_cache.summary())
+    if _archive is not None:
+        lines.append(_archive.summary())
+    return "\n".join(lines)
@@ -0,0 +1,210 @@
+import html
+import http.server
+import json
+import multiprocessing
+import random
+import time
+
+# ---------------------------------------------------------
+# SYNTHETIC icd10data-SHAPED PAGES
+# Rebuilt from a scraped node so the extractors see the same structure
+# the live site serves: page chrome around div.body-content, the
+# ul.codeHierarchy with the code and its children, and one span header
+# + <ul> per section.
+# ---------------------------------------------------------
+SECTION_TITLES = (
+    ("applicable_to", "Applicable To"),
+    ("approximate_synonyms", "Approximate Synonyms"),
+    ("clinical_information", "Clinical Information"),
+)
+
+NAV = "".join(
+    f'<li><a href="/ICD10CM/Codes/{ch}">{ch}</a> <span>Chapter {i}</span></li>'
+    for i, ch in enumerate(
+        ["A00-B99", "C00-D49", "D50-D89", "E00-E89", "F01-F99", "G00-G99",
+         "H00-H59", "H60-H95", "I00-I99", "J00-J99", "K00-K95", "L00-L99",
+         "M00-M99", "N00-N99", "O00-O9A", "P00-P96", "Q00-Q99", "R00-R99",
+         "S00-T88", "U00-U85", "V00-Y99", "Z00-Z99"], 1)
+)
+
+def code_path(code, prefix="/ICD10CM/Codes/Fixture"):
+    return f"{prefix}/{code}"
+
+def _section(title, items):
+    if not items:
+        return ""
+    lis = "".join(f"<li>{html.escape(i)}</li>" for i in items)
+    return f'<div class="section"><span>{title}</span><ul>{lis}</ul></div>'
+
+def render_page(node, href=code_path):
+    code = node["code"]
+    desc = html.escape(node["description"])
+
+    kids = "".join(
+        f'<li><a class="identifier" href="{href(c["code"])}">{c["code"]}</a> '
+        f'{html.escape(c["description"])}</li>'
+        for c in node.get("children", [])
+    )
+    sections = "".join(_section(title, node.get(key) or []) for key, title in SECTION_TITLES)
+
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>2024 ICD-10-CM Diagnosis Code {code}: {desc}</title></head><body>"
+        f'<div class="navbar"><ul class="nav">{NAV}</ul></div>'
+        '<div class="container"><div class="row">'
+        '<div class="col-sm-8 body-content">'
+        '<div class="breadcrumb"><a href="/ICD10CM/Codes">ICD-10-CM Codes</a> '
+        f'<a href="/ICD10CM/Codes/A00-B99">A00-B99</a></div>'
+        f'<h1 class="pageHeading">2024 ICD-10-CM Diagnosis Code {code}</h1>'
+        f'<h2 class="codeDescription">{desc}</h2>'
+        f'<ul class="codeHierarchy"><li>{code} {desc}</li>{kids}</ul>'
+        f"{sections}"
+        "<p><strong>Code History</strong></p><ul><li>2016 (effective 10/1/2015): New code</li></ul>"
+        "</div>"
+        f'<div class="col-sm-4 sidebar"><ul>{NAV}</ul></div>'
+        "</div></div>"
+        "<footer><span>Terms of Use</span> <span>Privacy</span></footer>"
+        "</body></html>"
+    )
+
+# ---------------------------------------------------------
+# WHOLE TREES
+# ---------------------------------------------------------
+def walk(nodes):
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node.get("children", [])))
+
+def site_pages(nodes, href=code_path):
+    # {path: html} for every node of a scraped tree
+    return {href(n["code"]): render_page(n, href) for n in walk(nodes)}
+
+def load_json_pages(path, limit=None, href=code_path):
+    with open(path, encoding="utf-8") as f:
+        nodes = json.load(f)
+    pages = []
+    for node in walk(nodes):
+        pages.append((node["code"], render_page(node, href)))
+        if limit and len(pages) >= limit:
+            break
+    return pages
+
+def load_tree(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+# ---------------------------------------------------------
+# SYNTHETIC TREES
+# roots x (1 + breadth + ... + breadth^depth) pages; a child's code is
+# its parent's plus one character, so child_links() picks it up.
+# ---------------------------------------------------------
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+def synthetic_tree(roots=10, breadth=5, depth=3):
+    def node(code, level):
+        children = []
+        if level < depth:
+            children = [node(code + DIGITS[i], level + 1) for i in range(breadth)]
+        return {
+            "code": code,
+            "description": f"Synthetic condition {code}",
+            "clinical_information": [f"A clinical paragraph describing {code}. " * 8],
+            "applicable_to": [f"{code} variant one", f"{code} variant two"],
+            "approximate_synonyms": [f"{code} synonym"],
+            "children": children,
+        }
+    if breadth > len(DIGITS):
+        raise ValueError(f"breadth is at most {len(DIGITS)}")
+    return [node(f"Q{i:02d}", 0) for i in range(roots)]
+
+def grandchild_tree():
+    # a synthetic tree where one page also links a grandchild (as A92
+    # lists A92.39 next to A92.3), so one page sits in two places
+    nodes = synthetic_tree(roots=3, breadth=3, depth=2)
+    root = nodes[0]
+    root["children"] = root["children"] + [root["children"][0]["children"][1]]
+    return nodes
+
+# ---------------------------------------------------------
+# FIXTURE SERVER
+# Serves a tree's pages over local HTTP/1.1 (keep-alive, threaded) from
+# a separate process, so its CPU and memory stay out of the crawler's
+# numbers. Each request waits latency + uniform(0, jitter) seconds and
+# fails with a 503 at error_rate; the seed makes a run repeatable.
+#
+#   with FixtureServer(partial(synthetic_tree, 10, 5, 3), latency=0.02) as srv:
+#       engine.scrape_codes(srv.roots)
+# ---------------------------------------------------------
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes; without TCP_NODELAY
+    # the body waits ~40 ms on the client's delayed ACK
+    disable_nagle_algorithm = True
+    pages = {}
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    rng = random.Random(0)
+
+    def do_GET(self):
+        delay = self.latency + self.rng.random() * self.jitter
+        if delay:
+            time.sleep(delay)
+        if self.rng.random() < self.error_rate:
+            self.reply(503, b"")
+            return
+        body = self.pages.get(self.path)
+        self.reply(200 if body is not None else 404, body or b"")
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(conn, make_nodes, latency, jitter, error_rate, seed, port):
+    nodes = make_nodes()
+    handler = type("Handler", (FixtureHandler,), {
+        "pages": {path: page.encode("utf-8") for path, page in site_pages(nodes).items()},
+        "latency": latency,
+        "jitter": jitter,
+        "error_rate": error_rate,
+        "rng": random.Random(seed),
+    })
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    conn.send((server.server_address[1],
+               [(n["code"], code_path(n["code"])) for n in nodes],
+               sum(1 for _ in walk(nodes)),
+               len(handler.pages)))
+    server.serve_forever()
+
+
+class FixtureServer:
+
+    def __init__(self, make_nodes, latency=0.0, jitter=0.0, error_rate=0.0, seed=0, port=0):
+        # make_nodes: picklable callable returning root nodes in the JSON
+        # shape, e.g. partial(load_tree, path) or partial(synthetic_tree, ...);
+        # port=0 picks a free one, a fixed port keeps URLs stable across runs
+        self.args = (make_nodes, latency, jitter, error_rate, seed, port)
+        self.process = None
+
+    def __enter__(self):
+        ours, theirs = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=serve, args=(theirs, *self.args),
+                                               daemon=True)
+        self.process.start()
+        port, roots, self.nodes, self.pages = ours.recv()
+        self.url = f"http://127.0.0.1:{port}"
+        self.roots = [(code, self.url + path) for code, path in roots]
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.join()
@@ -0,0 +1,139 @@
+import glob
+from array import array
+
+from .output import load_nodes, walk_tree
+from .parse import TEXT_LISTS
+
+# ---------------------------------------------------------
+# CODE INDEX (merged A-Z forest, Euler-tour numbered)
+#
+# Every distinct code gets its pre-order position i; exit[i] is the last
+# position inside its subtree, so
+#   y is an ancestor of x   <=>  pos[y] < pos[x] <= exit[pos[y]]
+#   subtree of y            ==   positions pos[y] .. exit[pos[y]]
+#   leaf (billable code)    <=>  exit[i] == i
+#
+# Pages link grandchildren as well as children (A92 lists A92.39 next
+# to A92.3); a code is placed under the nearest (longest) code linking
+# to it, the same parent build-db stores.
+# ---------------------------------------------------------
+DEFAULT_FILES = "*_Applicable_Approximate.json"
+
+
+class CodeIndex:
+
+    def __init__(self, forests):
+        # forests: iterable of root CodeNode lists, e.g. one per output file
+        first = {}
+        nearest = {}
+        for roots in forests:
+            for root in roots:
+                for node, parent, _ in walk_tree(root):
+                    code = node.code
+                    first.setdefault(code, node)
+                    if parent and len(parent) > len(nearest.get(code) or ""):
+                        nearest[code] = parent
+
+        kids = {}
+        top = []
+        for code in first:                          # first-seen order
+            parent = nearest.get(code)
+            (kids.setdefault(parent, []) if parent else top).append(code)
+
+        n = len(first)
+        self.codes = []
+        self.pos = {}
+        self.parent = array("i", [-1]) * n
+        self.exit = array("i", range(n))
+        self.descriptions = []
+        self.sections = []
+
+        stack = [(code, -1) for code in reversed(top)]
+        while stack:
+            code, parent = stack.pop()
+            i = len(self.codes)
+            self.pos[code] = i
+            self.codes.append(code)
+            self.parent[i] = parent
+            node = first[code]
+            self.descriptions.append(node.description)
+            self.sections.append(tuple(getattr(node, key) for key in TEXT_LISTS))
+            stack.extend((child, i) for child in reversed(kids.get(code, ())))
+
+        # descendants follow their ancestor, so one backwards sweep closes
+        # every subtree
+        for i in range(n - 1, 0, -1):
+            p = self.parent[i]
+            if p >= 0 and self.exit[i] > self.exit[p]:
+                self.exit[p] = self.exit[i]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self.pos
+
+    # -----------------------------------------------------
+    # LOOKUPS
+    # -----------------------------------------------------
+    def node(self, code):
+        i = self.pos.get(code)
+        if i is None:
+            return None
+        node = {"code": code, "description": self.descriptions[i]}
+        for key, items in zip(TEXT_LISTS, self.sections[i]):
+            node[key] = list(items)
+        node["parent"] = self.codes[self.parent[i]] if self.parent[i] >= 0 else None
+        node["children"] = self.children(code)
+        return node
+
+    def parent_of(self, code):
+        p = self.parent[self.pos[code]]
+        return self.codes[p] if p >= 0 else None
+
+    def ancestors(self, code):
+        # nearest first; at most the depth of the tree (<= 7 levels)
+        out = []
+        p = self.parent[self.pos[code]]
+        while p >= 0:
+            out.append(self.codes[p])
+            p = self.parent[p]
+        return out
+
+    def children(self, code):
+        i = self.pos[code]
+        out = []
+        j = i + 1
+        while j <= self.exit[i]:
+            out.append(self.codes[j])
+            j = self.exit[j] + 1
+        return out
+
+    # -----------------------------------------------------
+    # SUBTREE QUERIES
+    # -----------------------------------------------------
+    def is_descendant(self, code, of):
+        i = self.pos.get(code)
+        j = self.pos.get(of)
+        if i is None or j is None:
+            return False
+        return j < i <= self.exit[j]
+
+    def subtree_size(self, code):
+        i = self.pos[code]
+        return self.exit[i] - i + 1
+
+    def descendants(self, code):
+        i = self.pos[code]
+        return self.codes[i + 1:self.exit[i] + 1]
+
+    def leaves(self, code):
+        # billable codes are the ones with nothing below them
+        i = self.pos[code]
+        exit = self.exit
+        return [self.codes[j] for j in range(i, exit[i] + 1) if exit[j] == j]
+
+
+def load(paths=None):
+    paths = paths or sorted(glob.glob(DEFAULT_FILES))
+    return CodeIndex(load_nodes(path) for path in paths)
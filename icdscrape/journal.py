@@ -0,0 +1,136 @@
+import json
+import os
+
+from .parse import TEXT_LISTS, Page
+
+# ---------------------------------------------------------
+# CRAWL JOURNAL (append-only JSONL, one file per letter)
+#
+# One line per scraped page:
+#   {"url": ..., "node": {code, description, sections...}, "links": [[code, href], ...],
+#    "hash": sha256 of the page body}
+#
+# "links" is the page's child frontier, so a restarted crawl can rebuild
+# the tree from the journal alone: pages already journaled are not
+# fetched again, only their missing descendants are. Only the records
+# found when resuming are held in memory; new ones go straight to disk.
+#
+# When a letter finishes, its journal is kept as the letter's manifest:
+# the previous run's pages and body hashes for crawl --incremental.
+# ---------------------------------------------------------
+FSYNC_EVERY = 100
+
+
+class Journal:
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}          # url -> record, only the ones found when resuming
+        self.resumed = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self._load()
+        self.f = open(path, "a", encoding="utf-8")
+        self._pending = 0
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        good = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break                   # torn write from a crash
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break
+                self.done[rec["url"]] = rec
+                good += len(line)
+
+        # drop anything after the last complete record before appending
+        if good != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+
+        self.resumed = len(self.done)
+
+    # -----------------------------------------------------
+    # READ / WRITE
+    # -----------------------------------------------------
+    def get(self, url):
+        rec = self.done.get(url)
+        return page_of(rec) if rec else None
+
+    def digest(self, url):
+        rec = self.done.get(url)
+        return rec.get("hash") if rec else None
+
+    def add(self, url, page, digest=None):
+        node = page._asdict()
+        links = node.pop("links")
+        rec = {"url": url, "node": node, "links": links}
+        if digest:
+            rec["hash"] = digest
+        self.f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self.f.flush()
+        self._pending += 1
+        if self._pending >= FSYNC_EVERY:
+            os.fsync(self.f.fileno())
+            self._pending = 0
+
+    def close(self):
+        if not self.f.closed:
+            self.f.flush()
+            os.fsync(self.f.fileno())
+            self.f.close()
+
+    def keep(self, path):
+        # the letter's output is safely written; the journal becomes its
+        # manifest for the next run
+        self.close()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        os.replace(self.path, path)
+
+
+def page_of(rec):
+    node = rec["node"]
+    return Page(
+        node["code"],
+        node["description"],
+        *(tuple(node[key]) for key in TEXT_LISTS),
+        tuple(tuple(link) for link in rec["links"]),
+    )
+
+def journal_path(folder, letter):
+    return os.path.join(folder, f"{letter}.jsonl")
+
+# ---------------------------------------------------------
+# MANIFEST (read-only: the last finished run of a letter)
+# ---------------------------------------------------------
+class Manifest:
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        rec = json.loads(line)
+                        if rec.get("hash"):
+                            self.records[rec["url"]] = rec
+
+    def __len__(self):
+        return len(self.records)
+
+    def known(self, url):
+        # (body hash, Page) from the previous run, or None
+        rec = self.records.get(url)
+        return (rec["hash"], page_of(rec)) if rec else None
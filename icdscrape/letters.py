@@ -0,0 +1,84 @@
+from collections import namedtuple
+
+# ---------------------------------------------------------
+# PER-LETTER CHAPTER CONFIG
+#
+# chapters : chapter pages under /ICD10CM/Codes/ that hold the letter
+# scope    : substring a range link's href must contain
+# href     : regex a range link's href must match ...
+# text     : ... or regex its link text must match ("" = href only)
+# roots    : regex a 3-character root code must match
+#
+# scope=None means the letter has no range pages of its own: root codes
+# are read straight off the chapter page (S00-S99).
+# ---------------------------------------------------------
+Letter = namedtuple("Letter", "letter chapters scope href text roots")
+
+
+def _letter(letter, chapters, scope="chapter", href=None, text=None, roots=None):
+    if scope == "chapter":
+        scope = f"/ICD10CM/Codes/{chapters[0]}/"
+    return Letter(
+        letter,
+        tuple(chapters),
+        scope,
+        href or rf"/{letter}\d{{2}}",
+        text if text is not None else rf"^{letter}",
+        roots or rf"^{letter}\d{{2}}$",
+    )
+
+
+def _ranged(letter, chapters, scope="chapter"):
+    # V00-Y99 style: only explicit /X00-X09 range links count
+    return _letter(letter, chapters, scope, href=rf"/{letter}\d{{2}}-{letter}\d{{2}}", text="")
+
+
+LETTERS = {
+    "A": _letter("A", ["A00-B99"], href=r"/A\d", text=r"^A\d{2}"),
+    "B": _letter("B", ["A00-B99"]),
+    "C": _letter("C", ["C00-D49"]),
+    "D": _letter("D", ["C00-D49", "D50-D89"], scope="/ICD10CM/Codes/"),
+    "E": _letter("E", ["E00-E89"]),
+    "F": _letter("F", ["F01-F99"]),
+    "G": _letter("G", ["G00-G99"]),
+    "H": _letter("H", ["H00-H59", "H60-H95"], scope="/ICD10CM/Codes/H"),
+    "I": _letter("I", ["I00-I99"]),
+    "J": _letter("J", ["J00-J99"]),
+    "K": _letter("K", ["K00-K95"]),
+    "L": _letter("L", ["L00-L99"]),
+    "M": _letter("M", ["M00-M99"]),
+    "N": _letter("N", ["N00-N99"]),
+    "O": _letter("O", ["O00-O9A"], href=r"/O\d{2}|O9A", roots=r"^(O\d{2}$|O9A)"),
+    "P": _letter("P", ["P00-P96"]),
+    "Q": _letter("Q", ["Q00-Q99"]),
+    "R": _letter("R", ["R00-R99"]),
+    "S": _letter("S", ["S00-T88"], scope=None),
+    "T": _ranged("T", ["S00-T88"]),
+    "U": _ranged("U", ["U00-U49", "U50-U85"], scope="/ICD10CM/Codes/U"),
+    "V": _ranged("V", ["V00-Y99"]),
+    "W": _ranged("W", ["V00-Y99"]),
+    "X": _ranged("X", ["V00-Y99"]),
+    "Y": _ranged("Y", ["V00-Y99"]),
+    "Z": _ranged("Z", ["Z00-Z99"]),
+}
+
+
+def output_name(letter, ext="json"):
+    return f"{letter}_Applicable_Approximate.{ext}"
+
+
+def parse_letters(spec):
+    # "A-Z", "S,T", "ST", "A-C,T" -> ["A", "B", "C", "T"]
+    picked = []
+    for part in spec.upper().replace(" ", "").split(","):
+        if not part:
+            continue
+        if len(part) == 3 and part[1] == "-":
+            lo, hi = part[0], part[2]
+            part = "".join(chr(c) for c in range(ord(lo), ord(hi) + 1))
+        for letter in part:
+            if letter not in LETTERS:
+                raise ValueError(f"unknown letter: {letter}")
+            if letter not in picked:
+                picked.append(letter)
+    return picked
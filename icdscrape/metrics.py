@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ---------------------------------------------------------
+# CRAWL METRICS
+#
+# stages   : wall time per stage (fetch, parse, description, sections,
+#            links, journal, write): count, total and slowest call
+# counters : http requests / retries / errors / throttled, bytes
+#            downloaded, cache hits, archive replays, pages
+# gauges   : http requests in flight
+#
+# Parse-side stages run in the parser workers; each batch carries its
+# workers' numbers back (take() / merge()), so totals cover every process.
+#
+# Exported as Prometheus text (GET /metrics on --metrics-port) and/or a
+# JSON snapshot rewritten every --metrics-interval seconds. Disabled,
+# timed() hands back one shared no-op context and count() returns at once.
+# ---------------------------------------------------------
+METRICS = {
+    "enabled": True,
+    "json_path": None,       # periodic JSON snapshot
+    "interval": 10.0,        # seconds between snapshots
+    "port": None,            # Prometheus text endpoint on 127.0.0.1
+}
+
+PREFIX = "icdscrape"
+
+_stages = {}        # name -> [count, seconds, max seconds]
+_counters = {}
+_gauges = {}
+_started = time.time()
+
+_NOOP = nullcontext()
+
+def configure(**options):
+    for key, value in options.items():
+        if key not in METRICS:
+            raise TypeError(f"unknown metrics option: {key}")
+        METRICS[key] = value
+
+def reset():
+    global _started
+    _stages.clear()
+    _counters.clear()
+    _gauges.clear()
+    _started = time.time()
+
+# ---------------------------------------------------------
+# RECORDING
+# ---------------------------------------------------------
+class _Timer:
+    __slots__ = ("name", "t")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t = time.perf_counter()
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.t)
+
+def timed(name):
+    # with metrics.timed("parse"): ...
+    return _Timer(name) if METRICS["enabled"] else _NOOP
+
+def observe(name, seconds):
+    if not METRICS["enabled"]:
+        return
+    s = _stages.get(name)
+    if s is None:
+        _stages[name] = [1, seconds, seconds]
+    else:
+        s[0] += 1
+        s[1] += seconds
+        if seconds > s[2]:
+            s[2] = seconds
+
+def count(name, n=1):
+    if METRICS["enabled"]:
+        _counters[name] = _counters.get(name, 0) + n
+
+def gauge(name, delta):
+    if METRICS["enabled"]:
+        _gauges[name] = _gauges.get(name, 0) + delta
+
+# ---------------------------------------------------------
+# ACROSS PROCESSES (parser workers)
+# ---------------------------------------------------------
+def take():
+    # this process's numbers since the last take(), then start over
+    out = {"stages": dict(_stages), "counters": dict(_counters)}
+    _stages.clear()
+    _counters.clear()
+    return out
+
+def merge(part):
+    for name, (n, seconds, slowest) in part["stages"].items():
+        s = _stages.setdefault(name, [0, 0.0, 0.0])
+        s[0] += n
+        s[1] += seconds
+        s[2] = max(s[2], slowest)
+    for name, n in part["counters"].items():
+        _counters[name] = _counters.get(name, 0) + n
+
+# ---------------------------------------------------------
+# EXPORT
+# dict() copies are atomic under the GIL, so the exporter threads never
+# see a table mid-resize.
+# ---------------------------------------------------------
+def snapshot():
+    return {
+        "time": time.time(),
+        "uptime": time.time() - _started,
+        "stages": {name: {"count": n, "seconds": seconds, "max": slowest}
+                   for name, (n, seconds, slowest) in dict(_stages).items()},
+        "counters": dict(_counters),
+        "gauges": dict(_gauges),
+    }
+
+def prometheus_text():
+    snap = snapshot()
+    lines = [
+        f"# TYPE {PREFIX}_stage_seconds summary",
+    ]
+    for name, s in sorted(snap["stages"].items()):
+        lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{name}"}} {s["seconds"]:.6f}')
+        lines.append(f'{PREFIX}_stage_seconds_count{{stage="{name}"}} {s["count"]}')
+    for name, n in sorted(snap["counters"].items()):
+        lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+        lines.append(f"{PREFIX}_{name}_total {n}")
+    for name, n in sorted(snap["gauges"].items()):
+        lines.append(f"# TYPE {PREFIX}_{name} gauge")
+        lines.append(f"{PREFIX}_{name} {n}")
+    lines.append(f"# TYPE {PREFIX}_uptime_seconds gauge")
+    lines.append(f"{PREFIX}_uptime_seconds {snap['uptime']:.3f}")
+    return "\n".join(lines) + "\n"
+
+def write_json(path):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Exporter:
+    # background threads for the endpoint and the snapshot file; a final
+    # snapshot is written on stop()
+
+    def __init__(self, json_path=None, interval=10.0, port=None):
+        self.json_path = json_path
+        self.interval = interval
+        self.server = None
+        self.stopping = threading.Event()
+        self.threads = []
+
+        if port is not None:
+            self.server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+            self.threads.append(threading.Thread(target=self.server.serve_forever, daemon=True))
+        if json_path:
+            self.threads.append(threading.Thread(target=self._snapshots, daemon=True))
+        for t in self.threads:
+            t.start()
+
+    def _snapshots(self):
+        while not self.stopping.wait(self.interval):
+            write_json(self.json_path)
+
+    def stop(self):
+        self.stopping.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        for t in self.threads:
+            t.join()
+        if self.json_path:
+            write_json(self.json_path)
+
+def start():
+    # None when nothing is exported
+    if not METRICS["enabled"] or not (METRICS["json_path"] or METRICS["port"] is not None):
+        return None
+    return Exporter(METRICS["json_path"], METRICS["interval"], METRICS["port"])
+
+# ---------------------------------------------------------
+# REPORT
+# ---------------------------------------------------------
+def summary():
+    if not _stages:
+        return "TIME: (no stages recorded)"
+    lines = ["TIME:  stage          calls     total   mean ms    max ms"]
+    for name, (n, seconds, slowest) in sorted(_stages.items(), key=lambda kv: -kv[1][1]):
+        lines.append(f"       {name:<12} {n:>7} {seconds:>8.2f}s {seconds * 1e3 / n:>9.2f}"
+                     f" {slowest * 1e3:>9.1f}")
+    if _counters:
+        lines.append("COUNT: " + ", ".join(f"{k} {v:,}" for k, v in sorted(_counters.items())))
+    return "\n".join(lines)
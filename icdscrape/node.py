@@ -0,0 +1,95 @@
+import sys
+
+from .parse import TEXT_LISTS
+
+# ---------------------------------------------------------
+# CODE NODE
+# The in-memory tree, both while crawling and when loading outputs.
+# A __slots__ object instead of a six-key dict; section lists are tuples
+# (the empty ones all share one object) and leaves share the empty
+# children tuple until a child is added.
+#
+# to_dict() / from_dict() convert losslessly to the JSON node shape:
+#   {code, description, clinical_information, applicable_to,
+#    approximate_synonyms, children}
+# ---------------------------------------------------------
+class CodeNode:
+    __slots__ = ("code", "description") + TEXT_LISTS + ("children",)
+
+    def __init__(self, code, description, clinical_information=(), applicable_to=(),
+                 approximate_synonyms=(), children=()):
+        self.code = code
+        self.description = description
+        self.clinical_information = clinical_information
+        self.applicable_to = applicable_to
+        self.approximate_synonyms = approximate_synonyms
+        self.children = children
+
+    def __repr__(self):
+        return f"CodeNode({self.code!r}, {self.description!r}, {len(self.children)} children)"
+
+    def __eq__(self, other):
+        if not isinstance(other, CodeNode):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def add_child(self, child):
+        if self.children:
+            self.children.append(child)
+        else:
+            self.children = [child]
+
+    # -----------------------------------------------------
+    # CONVERSION
+    # -----------------------------------------------------
+    @classmethod
+    def from_page(cls, page):
+        # parse.Page: already tuples, shared by every node built from it
+        return cls(page.code, page.description, page.clinical_information,
+                   page.applicable_to, page.approximate_synonyms)
+
+    @classmethod
+    def from_record(cls, rec, children=()):
+        # rec: a dict with the JSON node's fields (children are passed in)
+        return cls(
+            rec["code"],
+            rec["description"],
+            tuple(rec["clinical_information"]),
+            tuple(rec["applicable_to"]),
+            tuple(rec["approximate_synonyms"]),
+            children,
+        )
+
+    def record(self):
+        return {
+            "code": self.code,
+            "description": self.description,
+            "clinical_information": list(self.clinical_information),
+            "applicable_to": list(self.applicable_to),
+            "approximate_synonyms": list(self.approximate_synonyms),
+        }
+
+    def to_dict(self):
+        node = self.record()
+        node["children"] = [child.to_dict() for child in self.children]
+        return node
+
+    @classmethod
+    def from_dict(cls, node):
+        children = [cls.from_dict(child) for child in node["children"]]
+        return cls.from_record(node, children or ())
+
+
+def json_object_hook(obj):
+    # json.load(..., object_hook=...) builds CodeNodes bottom-up, so the
+    # dict tree never exists in full; repeated text is interned
+    if "code" not in obj or "children" not in obj:
+        return obj
+    return CodeNode(
+        obj["code"],
+        sys.intern(obj["description"]),
+        tuple(sys.intern(t) for t in obj["clinical_information"]),
+        tuple(sys.intern(t) for t in obj["applicable_to"]),
+        tuple(sys.intern(t) for t in obj["approximate_synonyms"]),
+        obj["children"] or (),
+    )
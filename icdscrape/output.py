@@ -0,0 +1,243 @@
+import json
+import os
+import sys
+
+from .node import CodeNode, json_object_hook
+from .parse import TEXT_LISTS
+
+# ---------------------------------------------------------
+# OUTPUT FILES
+# Every format writes to "<path>.tmp" and is renamed over <path> only on
+# commit(); a crash leaves the previous file untouched.
+#
+# The crawler feeds a writer CodeNodes two ways, and each format uses one:
+#   on_root(node)                -> a finished root subtree, in root order
+#   on_node(node, parent, depth, ord)
+#                                -> a single page, as soon as it is scraped;
+#                                   ord is its place among its parent's
+#                                   children (or among the roots)
+# ---------------------------------------------------------
+class AtomicWriter:
+    ext = "json"
+    per_node = False        # True if the format wants on_node calls
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp = path + ".tmp"
+        self.f = open(self.tmp, "w", encoding="utf-8")
+        self.count = 0
+
+    def on_root(self, node):
+        pass
+
+    def on_node(self, node, parent, depth, ord):
+        pass
+
+    def finish(self):
+        pass
+
+    def commit(self):
+        self.finish()
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.f.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        if not self.f.closed:
+            self.f.close()
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+# ---------------------------------------------------------
+# NESTED JSON (the original *_Applicable_Approximate.json)
+# Same bytes as json.dump(nodes, f, indent=2), one root subtree at a
+# time, so a finished subtree can be dropped from memory.
+# ---------------------------------------------------------
+class JsonArrayWriter(AtomicWriter):
+
+    def on_root(self, node):
+        # one level down: every line of the item gains two spaces
+        # (json.dumps escapes newlines inside strings, so this is safe)
+        text = json.dumps(node.to_dict(), indent=2).replace("\n", "\n  ")
+        self.f.write(("[\n  " if self.count == 0 else ",\n  ") + text)
+        self.count += 1
+
+    def finish(self):
+        self.f.write("\n]" if self.count else "[]")
+
+# ---------------------------------------------------------
+# FLAT JSON LINES
+# One compact object per code, written the moment its page is parsed:
+#   {"code", "parent", "depth", "ord", "description", <section lists>}
+# parent is null and depth 0 for root codes; ord is the code's place
+# among its parent's children (root codes: among the roots). Lines
+# arrive in scrape order, not tree order; parent and ord carry the
+# structure.
+# ---------------------------------------------------------
+def flat_record(node, parent, depth, ord):
+    rec = {"code": node.code, "parent": parent, "depth": depth, "ord": ord}
+    for key, value in node.record().items():
+        if key not in rec:
+            rec[key] = value
+    return rec
+
+class JsonLinesWriter(AtomicWriter):
+    ext = "jsonl"
+    per_node = True
+
+    def on_node(self, node, parent, depth, ord):
+        rec = flat_record(node, parent, depth, ord)
+        self.f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.count += 1
+
+
+# ---------------------------------------------------------
+# STRING TABLE (deduplicated)
+# Every distinct description / section paragraph is stored once; nodes
+# are positional arrays that refer to it by index:
+#
+# {"fields": ["code", "description", <TEXT_LISTS>..., "children"],
+#  "nodes": [[code, desc_id, [text_id, ...], ..., [child, ...]], ...],
+#  "strings": ["...", ...]}
+#
+# Roots are streamed as they finish; the table is written last.
+# ---------------------------------------------------------
+STRTAB_FIELDS = ("code", "description") + TEXT_LISTS + ("children",)
+
+class StringTableWriter(AtomicWriter):
+    ext = "strtab.json"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.ids = {}
+        self.strings = []
+        self.f.write('{"fields":' + json.dumps(STRTAB_FIELDS, separators=(",", ":"))
+                     + ',\n"nodes":[')
+
+    def _id(self, text):
+        i = self.ids.get(text)
+        if i is None:
+            i = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return i
+
+    def _pack(self, node):
+        row = [node.code, self._id(node.description)]
+        row.extend([self._id(t) for t in getattr(node, key)] for key in TEXT_LISTS)
+        row.append([self._pack(child) for child in node.children])
+        return row
+
+    def on_root(self, node):
+        self.f.write(",\n" if self.count else "\n")
+        self.f.write(json.dumps(self._pack(node), ensure_ascii=False, separators=(",", ":")))
+        self.count += 1
+
+    def finish(self):
+        self.f.write('\n],\n"strings":[\n')
+        self.f.write(",\n".join(json.dumps(t, ensure_ascii=False) for t in self.strings))
+        self.f.write("\n]}\n")
+
+
+def load_string_table(path):
+    # back to CodeNodes; repeated text stays one shared object
+    with open(path, encoding="utf-8") as f:
+        doc = json.load(f)
+    strings = [sys.intern(t) for t in doc["strings"]]
+    fields = doc["fields"]
+    texts = fields[2:-1]
+
+    def unpack(row):
+        node = {"code": row[0], "description": strings[row[1]]}
+        for key, ids in zip(texts, row[2:-1]):
+            node[key] = [strings[i] for i in ids]
+        return CodeNode.from_record(node, [unpack(child) for child in row[-1]] or ())
+
+    return [unpack(row) for row in doc["nodes"]]
+
+
+FORMATS = {
+    "json": JsonArrayWriter,
+    "jsonl": JsonLinesWriter,
+    "strtab": StringTableWriter,
+}
+
+def writer(fmt, path):
+    return FORMATS[fmt](path)
+
+# ---------------------------------------------------------
+# WHOLE TREES (convert / re-export)
+# ---------------------------------------------------------
+def walk_tree(root):
+    # (node, parent_code, depth), pre-order
+    for node, parent, depth, _ in walk_places(root):
+        yield node, parent, depth
+
+def walk_places(root, ord=0):
+    # (node, parent_code, depth, ord), pre-order; ord as in flat_record
+    stack = [(root, None, 0, ord)]
+    while stack:
+        node, parent, depth, ord = stack.pop()
+        yield node, parent, depth, ord
+        for i in range(len(node.children) - 1, -1, -1):
+            stack.append((node.children[i], node.code, depth + 1, i))
+
+def load_json_lines(path):
+    # flat records back to trees: each line hangs under the latest place
+    # its parent code sits one level up. A code listed twice under the
+    # same parent (a page linking a grandchild too) fills the next such
+    # place. Roots and siblings are then put in ord order (files without
+    # ord keep line order).
+    roots = []
+    places = {}                                 # (code, depth) -> CodeNodes
+    order = {}                                  # id(CodeNode) -> ord
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            rec = json.loads(line)
+            code, parent, depth = rec["code"], rec["parent"], rec["depth"]
+            node = CodeNode(code, sys.intern(rec["description"]),
+                            *(tuple(sys.intern(t) for t in rec[key]) for key in TEXT_LISTS))
+            order[id(node)] = rec.get("ord", n)
+            if parent is None:
+                roots.append(node)
+            else:
+                under = places.get((parent, depth - 1))
+                if not under:
+                    raise ValueError(f"{path}:{n}: {code} comes before its parent {parent}")
+                for up in under:
+                    if all(kid.code != code for kid in up.children):
+                        break
+                up.add_child(node)
+            places.setdefault((code, depth), []).append(node)
+
+    def position(node):
+        return order[id(node)]
+
+    for under in places.values():
+        for node in under:
+            if len(node.children) > 1:
+                node.children.sort(key=position)
+    roots.sort(key=position)
+    return roots
+
+def load_nodes(path):
+    # any output format back to a list of root CodeNodes
+    if path.endswith(StringTableWriter.ext):
+        return load_string_table(path)
+    if path.endswith("." + JsonLinesWriter.ext):
+        return load_json_lines(path)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f, object_hook=json_object_hook)
+
+def export(nodes, fmt, path):
+    out = writer(fmt, path)
+    try:
+        for i, root in enumerate(nodes):
+            for node, parent, depth, ord in walk_places(root, i):
+                out.on_node(node, parent, depth, ord)
+            out.on_root(root)
+        out.commit()
+    except BaseException:
+        out.abort()
+        raise
+    return path
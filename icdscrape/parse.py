@@ -0,0 +1,168 @@
+import re
+import sys
+from collections import namedtuple
+
+from . import dom, metrics
+
+BASE_URL = "https://www.icd10data.com"
+
+# Every extractor below takes a document from dom.parse() and only talks
+# to it through the active dom backend, so bs4 / lxml / selectolax give
+# identical results.
+
+# ---------------------------------------------------------
+# CLEAN TEXT
+# ---------------------------------------------------------
+def clean(t):
+    if not t:
+        return ""
+    t = t.replace("\xa0", " ").replace("\n", " ").replace("\r", " ")
+    return re.sub(r"\s+", " ", t).strip()
+
+# ---------------------------------------------------------
+# DESCRIPTION
+# ---------------------------------------------------------
+def get_description(doc, code):
+    b = dom.backend()
+
+    ul = b.first(doc, "ul", "codeHierarchy")
+    if ul is not None:
+        for li in b.find_all(ul, "li"):
+            text = clean(b.text(li) or "")
+            if text.startswith(code):
+                return clean(text[len(code):])
+
+    h2 = b.first(doc, "h2", "codeDescription")
+    if h2 is not None:
+        return clean(b.text(h2).replace(code, "").strip(" -"))
+
+    h1 = b.first(doc, "h1", "pageHeading")
+    if h1 is not None:
+        return clean(b.text(h1).replace(code, "").strip(" -"))
+
+    return ""
+
+# ---------------------------------------------------------
+# ALL SECTIONS IN ONE PASS
+# First span/strong/h3 whose text contains the heading, then the next
+# <ul> in document order. The document is walked once and each
+# candidate's text is built once for all headings.
+# ---------------------------------------------------------
+SECTIONS = (
+    ("clinical_information", "clinical information"),
+    ("applicable_to", "applicable to"),
+    ("approximate_synonyms", "approximate synonyms"),
+)
+
+HEADER_TAGS = ("span", "strong", "h3")
+
+def get_sections(doc):
+    b = dom.backend()
+    result = {key: [] for key, _ in SECTIONS}
+    todo = list(SECTIONS)
+    waiting = []     # headers seen, next <ul> not reached yet
+
+    for el in b.elements(doc):
+        name = b.tag(el)
+
+        if name == "ul":
+            if waiting:
+                items = [clean(b.text(li)) for li in b.find_all(el, "li")]
+                for key in waiting:
+                    result[key] = items
+                waiting = []
+                if not todo:
+                    break
+
+        elif name in HEADER_TAGS and todo:
+            text = b.text(el).lower()
+            for section in [s for s in todo if s[1] in text]:
+                todo.remove(section)
+                waiting.append(section[0])
+
+    return result
+
+# ---------------------------------------------------------
+# NODE + CHILD LINKS
+# ---------------------------------------------------------
+# text fields of a node
+TEXT_LISTS = ("clinical_information", "applicable_to", "approximate_synonyms")
+
+def page_node(doc, code):
+    sections = get_sections(doc)
+    return {
+        "code": code,
+        "description": get_description(doc, code),
+        "clinical_information": sections["clinical_information"],
+        "applicable_to": sections["applicable_to"],
+        "approximate_synonyms": sections["approximate_synonyms"],
+        "children": []
+    }
+
+def child_links(doc, code):
+    b = dom.backend()
+    body = b.first(doc, "div", "body-content")
+    if body is None:
+        return []
+
+    links = []
+    seen = set()
+    for a in b.find_all(body, "a"):
+        href = b.attr(a, "href")
+        if href is None:
+            continue
+
+        t = clean(b.text(a) or "")
+        if not t:
+            continue
+
+        c_code = t.split(" ")[0]
+
+        if (
+            c_code.startswith(code)
+            and len(c_code) > len(code)
+            and "-" not in c_code
+            and "/ICD10CM/Codes/" in href
+        ):
+            if c_code not in seen:
+                seen.add(c_code)
+                links.append((c_code, href))
+
+    return links
+
+# ---------------------------------------------------------
+# PAGE RECORD
+# All a crawl keeps of a page: plain strings and tuples, nothing that
+# points back into the document. scrape_html() is the only place a
+# crawl holds a DOM, and it releases it before returning, so memory no
+# longer grows with tree depth x page size.
+# ---------------------------------------------------------
+Page = namedtuple("Page", ("code", "description") + TEXT_LISTS + ("links",))
+
+def extract(doc, code):
+    # page_node() + child_links(), one timer per extractor
+    with metrics.timed("sections"):
+        sections = get_sections(doc)
+    with metrics.timed("description"):
+        description = get_description(doc, code)
+    with metrics.timed("links"):
+        links = tuple(child_links(doc, code))
+    return Page(code, description, *(tuple(sections[key]) for key in TEXT_LISTS), links)
+
+def scrape_html(html, code):
+    b = dom.backend()
+    with metrics.timed("parse"):
+        doc = b.parse(html)
+    try:
+        return extract(doc, code)
+    finally:
+        with metrics.timed("release"):
+            b.release(doc)
+
+def intern_page(page):
+    # one copy of each repeated string for the whole run (A00, A00.0 and
+    # A00.9 share one cholera paragraph)
+    return page._replace(
+        description=sys.intern(page.description),
+        **{key: tuple(sys.intern(t) for t in getattr(page, key)) for key in TEXT_LISTS},
+    )
@@ -0,0 +1,88 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import dom, metrics
+from .parse import scrape_html
+
+# ---------------------------------------------------------
+# PARSE WORKERS
+# Fetch tasks hand raw HTML to a pool of processes; each worker builds
+# the page record (parse.Page) and sends back only that (plus its stage
+# timings), so BeautifulSoup/lxml CPU time is spread over every core
+# instead of stalling the event loop.
+# ---------------------------------------------------------
+def default_workers():
+    # leave one core for the event loop (network, journal, JSON output)
+    return max((os.cpu_count() or 1) - 1, 0)
+
+def _init_worker(backend, timing):
+    dom.use(backend)
+    # a forked worker starts with a copy of the parent's numbers
+    metrics.reset()
+    metrics.configure(enabled=timing)
+
+def parse_batch(items):
+    pages = [scrape_html(html, code) for code, html in items]
+    return pages, metrics.take()
+
+
+class ParsePool:
+    # batch_size   : pages sent to a worker per task (amortises pickling/IPC)
+    # max_pending  : pages fetched-or-fetching but not yet parsed; fetch
+    #                tasks wait on `slots` first, so a slow parse stage
+    #                throttles fetching instead of piling up HTML in memory
+    # linger       : how long a partial batch waits for company (seconds)
+
+    def __init__(self, workers=None, batch_size=8, max_pending=None, linger=0.005):
+        self.workers = workers or default_workers() or 1
+        self.batch_size = batch_size
+        self.max_pending = max_pending or self.workers * batch_size * 2
+        self.linger = linger
+        self.executor = ProcessPoolExecutor(
+            self.workers, initializer=_init_worker,
+            initargs=(dom.backend().name, metrics.METRICS["enabled"]),
+        )
+        self.slots = asyncio.Semaphore(self.max_pending)
+        self._batch = []
+        self._timer = None
+
+    async def parse(self, code, html):
+        fut = asyncio.get_running_loop().create_future()
+        self._batch.append((code, html, fut))
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.linger, self._flush)
+        return await fut
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+
+        done = asyncio.wrap_future(
+            self.executor.submit(parse_batch, [(code, html) for code, html, _ in batch])
+        )
+        done.add_done_callback(lambda f: self._deliver(batch, f))
+
+    def _deliver(self, batch, done):
+        if done.cancelled() or done.exception():
+            exc = done.exception() if not done.cancelled() else asyncio.CancelledError()
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+
+        pages, timings = done.result()
+        metrics.merge(timings)
+        for (_, _, fut), result in zip(batch, pages):
+            if not fut.done():
+                fut.set_result(result)
+
+    def close(self):
+        self.executor.shutdown()
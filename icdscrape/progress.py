@@ -0,0 +1,195 @@
+import json
+import sys
+import threading
+import time
+from collections import deque
+
+# ---------------------------------------------------------
+# CRAWL PROGRESS
+#
+# The engine only bumps counters (found: a page was queued, visited: a
+# page is done); a background thread renders them every `interval`
+# seconds, so a crawl costs two integer increments per page instead of a
+# terminal write per child.
+#
+# modes  bar   one status line on stderr, redrawn in place (the default
+#              when stderr is a terminal)
+#        lines the same status as a plain line every `interval` (default
+#              when stderr is piped)
+#        json  one JSON object per line on stderr, for progress and for
+#              every log() event
+#        off   no status; log() messages still print
+#
+# The ETA is pending pages / recent rate. Pending pages are the ones
+# queued but not yet visited, and every visit can queue more, so the
+# ETA is a lower bound that settles as the tree fills in.
+# ---------------------------------------------------------
+PROGRESS = {
+    "mode": "auto",
+    "interval": None,    # seconds between renders; None: 0.5 for bar, 10 otherwise
+    "window": 10.0,      # seconds of history behind the rate
+}
+
+MODES = ("auto", "bar", "lines", "json", "off")
+
+
+class _State:
+    __slots__ = ("found", "visited", "failed", "started", "label",
+                 "renders", "render_seconds")
+
+    def __init__(self, label=""):
+        self.found = 0
+        self.visited = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.label = label
+        self.renders = 0
+        self.render_seconds = 0.0
+
+
+_state = _State()
+_lock = threading.Lock()
+_renderer = None
+_width = 0              # length of the status line on screen (bar mode)
+
+def configure(**options):
+    for key, value in options.items():
+        if key not in PROGRESS:
+            raise TypeError(f"unknown progress option: {key}")
+        if key == "mode" and value not in MODES:
+            raise ValueError(f"progress mode must be one of {', '.join(MODES)}")
+        PROGRESS[key] = value
+
+def mode():
+    m = PROGRESS["mode"]
+    if m == "auto":
+        return "bar" if sys.stderr.isatty() else "lines"
+    return m
+
+# ---------------------------------------------------------
+# EVENTS (called from the crawl; keep these trivial)
+# ---------------------------------------------------------
+def found(n=1):
+    _state.found += n
+
+def visited(ok=True):
+    _state.visited += 1
+    if not ok:
+        _state.failed += 1
+
+def counts():
+    s = _state
+    return {"found": s.found, "visited": s.visited, "failed": s.failed,
+            "pending": s.found - s.visited, "elapsed": time.monotonic() - s.started}
+
+# ---------------------------------------------------------
+# MESSAGES
+# log("saved", "✔ DONE — Saved A.json", path="A.json") prints the text,
+# or in json mode emits {"event": "saved", "path": "A.json", ...}
+# ---------------------------------------------------------
+def log(event, text, **fields):
+    global _width
+    with _lock:
+        if mode() == "json":
+            _emit({"event": event, **fields})
+            return
+        if _width:
+            # the status line is redrawn on the next tick
+            sys.stderr.write("\r" + " " * _width + "\r")
+            sys.stderr.flush()
+            _width = 0
+        print(text, flush=True)
+
+def _emit(record):
+    record = {"ts": round(time.time(), 3), **record}
+    sys.stderr.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    sys.stderr.flush()
+
+# ---------------------------------------------------------
+# RENDERING
+# ---------------------------------------------------------
+def clock(seconds):
+    seconds = int(seconds)
+    h, rest = divmod(seconds, 3600)
+    return f"{h}:{rest // 60:02d}:{rest % 60:02d}" if h else f"{rest // 60}:{rest % 60:02d}"
+
+
+class _Renderer:
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.history = deque([(_state.started, 0)])     # (time, visited), last window
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopping.wait(self.interval):
+            self.render()
+
+    def rate(self, now, done):
+        self.history.append((now, done))
+        while len(self.history) > 2 and now - self.history[0][0] > PROGRESS["window"]:
+            self.history.popleft()
+        t0, d0 = self.history[0]
+        return (done - d0) / (now - t0) if now > t0 else 0.0
+
+    def render(self, final=False):
+        global _width
+        t = time.perf_counter()
+        s = _state
+        now = time.monotonic()
+        done, failed, pending = s.visited, s.failed, s.found - s.visited
+        rate = self.rate(now, done)
+        if final:
+            rate = done / (now - s.started) if now > s.started else 0.0
+        eta = pending / rate if rate > 0 and pending else None
+        m = mode()
+
+        with _lock:
+            if m == "json":
+                _emit({"event": "progress", "label": s.label, "visited": done,
+                       "pending": pending, "failed": failed, "rate": round(rate, 1),
+                       "eta": round(eta, 1) if eta is not None else None,
+                       "elapsed": round(now - s.started, 1)})
+            else:
+                line = (f"{s.label + ' ' if s.label else ''}{done:,} nodes  {rate:,.1f}/s  "
+                        f"pending {pending:,}  errors {failed:,}  "
+                        f"ETA {clock(eta) if eta is not None else '-'}  "
+                        f"elapsed {clock(now - s.started)}")
+                if m == "bar":
+                    pad = " " * max(_width - len(line), 0)
+                    sys.stderr.write("\r" + line + pad + ("\n" if final else ""))
+                    _width = 0 if final else len(line)
+                else:
+                    sys.stderr.write(line + "\n")
+                sys.stderr.flush()
+
+        s.renders += 1
+        s.render_seconds += time.perf_counter() - t
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+        self.render(final=True)
+
+
+def start(label=""):
+    # fresh counters; the status renders until stop()
+    global _state, _renderer
+    stop()
+    _state = _State(label)
+    m = mode()
+    if m != "off":
+        interval = PROGRESS["interval"] or (0.5 if m == "bar" else 10.0)
+        _renderer = _Renderer(interval)
+
+def stop():
+    global _renderer
+    if _renderer is not None:
+        _renderer.stop()
+        _renderer = None
+
+def cost():
+    # (renders, seconds spent rendering) for the current run
+    return _state.renders, _state.render_seconds
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+
+# ---------------------------------------------------------
+# TOKEN BUCKET (shared by every request in the run)
+#
+# `rate` tokens per second drip into a bucket holding at most `burst`;
+# each request takes one. A caller that finds the bucket empty goes into
+# debt and is told how long to wait, so waiters queue up fairly without
+# polling.
+#
+# Adaptive mode (AIMD):
+#   429 / 503 / network error -> rate halves, pause for Retry-After
+#   latency well above best   -> rate x 0.8  (slow_factor x best and
+#                                >= slow_margin seconds over it)
+#   healthy response          -> rate + step, up to max_rate
+#
+# Requests already in flight when the server pushes back will all report
+# it; cuts are spaced COOLDOWN apart so one burst counts as one event.
+# ---------------------------------------------------------
+THROTTLED = (429, 503)
+MAX_RETRY_AFTER = 600           # never trust a server to park us for longer
+COOLDOWN = 1.0
+
+
+def retry_after(value):
+    # Retry-After is either delta-seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class RateLimiter:
+
+    def __init__(self, rate=4.0, burst=4, min_rate=0.5, max_rate=16.0,
+                 adaptive=True, step=0.05, slow_factor=2.0, slow_margin=0.1):
+        self.start_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.adaptive = adaptive
+        self.step = step
+        self.slow_factor = slow_factor
+        self.slow_margin = slow_margin
+
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+        self.paused_until = 0.0
+        self.cut_at = float("-inf")
+
+        self.latency = None         # moving average of response time
+        self.fastest = None         # best moving average seen this run
+        self.throttled = 0
+        self.errors = 0
+
+    # -----------------------------------------------------
+    # TAKE A TOKEN
+    # -----------------------------------------------------
+    def reserve(self):
+        # take one token now; returns seconds to wait before sending
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        self.tokens -= 1
+
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.paused_until - now)
+
+    async def await_token(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    # -----------------------------------------------------
+    # FEEDBACK
+    # -----------------------------------------------------
+    def _set_rate(self, rate):
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+
+    def _cut(self, factor):
+        now = time.monotonic()
+        if now - self.cut_at >= COOLDOWN:
+            self.cut_at = now
+            self._set_rate(self.rate * factor)
+
+    def record(self, status, elapsed, headers=None):
+        if status in THROTTLED:
+            self.throttled += 1
+            self.back_off(retry_after(headers.get("Retry-After")) if headers else None)
+            return
+        if not self.adaptive:
+            return
+
+        self.latency = elapsed if self.latency is None else 0.8 * self.latency + 0.2 * elapsed
+        self.fastest = self.latency if self.fastest is None else min(self.fastest, self.latency)
+
+        slow = max(self.slow_factor * self.fastest, self.fastest + self.slow_margin)
+        if self.latency > slow:
+            self._cut(0.8)
+        else:
+            self._set_rate(self.rate + self.step)
+
+    def error(self):
+        self.errors += 1
+        self.back_off()
+
+    def back_off(self, pause=None):
+        if self.adaptive:
+            self._cut(0.5)
+        if pause is None:
+            pause = 1 / self.rate
+        self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    def summary(self):
+        return (f"Rate: {self.rate:.1f} req/s (started at {self.start_rate:.1f}), "
+                f"{self.throttled} throttled, {self.errors} errors")
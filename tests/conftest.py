@@ -0,0 +1,20 @@
+import pytest
+
+from icdscrape import fetch, progress
+
+# fetch and progress settings are module-level; every test that fetches
+# gets an uncached, unthrottled, unrecorded run and leaves them as found
+SETTINGS = (fetch.POOL, fetch.CACHE, fetch.RATE, fetch.ARCHIVE, progress.PROGRESS)
+
+
+@pytest.fixture
+def offline_fetch():
+    saved = [dict(table) for table in SETTINGS]
+    fetch.configure(cache=False, record=None, replay=None,
+                    rate=1e6, burst=8, max_rate=1e6, adaptive=False)
+    progress.configure(mode="off")
+    fetch.reset_counts()
+    yield
+    fetch.close()
+    for table, values in zip(SETTINGS, saved):
+        table.update(values)
@@ -0,0 +1,45 @@
+import sqlite3
+
+from icdscrape import cache
+from icdscrape.cache import PageCache
+
+
+def used_at(path, url):
+    db = sqlite3.connect(path)
+    try:
+        return db.execute("SELECT used_at FROM pages WHERE url = ?", (url,)).fetchone()[0]
+    finally:
+        db.close()
+
+
+def test_lookups_are_written_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "TOUCH_EVERY", 3)
+    path = str(tmp_path / "pages.sqlite")
+    pages = PageCache(path)
+    for i in range(3):
+        pages.put(f"/p{i}", f"<p>{i}</p>", {"ETag": f'"{i}"'})
+    stored = used_at(path, "/p0")
+
+    assert pages.get("/p0").body == "<p>0</p>"
+    assert pages.get("/p1").etag == '"1"'
+    assert used_at(path, "/p0") == stored           # noted, not written yet
+    pages.get("/p2")                                # third lookup: one batch
+    assert used_at(path, "/p0") > stored
+
+    pages.get("/p1")
+    pages.close()                                   # the rest on close
+    assert used_at(path, "/p1") > stored
+
+
+def test_summary_counts_what_the_mode_does(tmp_path):
+    path = str(tmp_path / "pages.sqlite")
+    pages = PageCache(path)
+    pages.put("/p", "<p>x</p>", {})
+    pages.mark_validated("/p", {})
+    assert pages.summary().startswith("CACHE: 1 revalidated (304), 1 downloaded")
+    pages.close()
+
+    offline = PageCache(path, cache_only=True)
+    offline.hits += 1
+    assert offline.summary().startswith("CACHE: 1 served from cache")
+    offline.close()
@@ -0,0 +1,39 @@
+import pytest
+
+from icdscrape import cli, db, output
+from icdscrape.node import CodeNode
+
+
+@pytest.fixture
+def store(tmp_path):
+    roots = [CodeNode("A00", "Cholera", (), ("Cholera classical",), ("Vibrio infection",),
+                      [CodeNode("A00.9", "Cholera, unspecified")])]
+    src = output.export(roots, "json", str(tmp_path / "A_Applicable_Approximate.json"))
+    path = str(tmp_path / "icd.sqlite")
+    db.build([src], path)
+    return path
+
+
+def test_search_and_lookup(store, capsys):
+    assert cli.main(["search", "cholera", "--db", store]) is None
+    assert cli.main(["lookup", "A00.9", "--db", store]) is None
+    out = capsys.readouterr().out
+    assert "A00.9" in out and "parent: A00" in out
+
+
+@pytest.mark.parametrize("query, raw", [("", False), ("   ", False),
+                                        ("femur* NOT", True), ('"open', True)])
+def test_bad_query_is_one_line(store, capsys, query, raw):
+    assert cli.main(["search", query, "--db", store] + (["--raw"] if raw else [])) == 1
+    out = capsys.readouterr().out.strip().splitlines()
+    assert len(out) == 1 and out[0].startswith("❌")
+
+
+@pytest.mark.parametrize("command", [["lookup", "A00"], ["search", "cholera"]])
+def test_missing_or_foreign_db(tmp_path, capsys, command):
+    assert cli.main(command + ["--db", str(tmp_path / "none.sqlite")]) == 1
+    other = tmp_path / "notes.txt"
+    other.write_text("not a database " * 100)
+    assert cli.main(command + ["--db", str(other)]) == 1
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert len(lines) == 2 and all(line.startswith("❌") for line in lines)
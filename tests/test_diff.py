@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from icdscrape import cli, diff, output
+from icdscrape.node import CodeNode
+
+
+def node(code, description, children=()):
+    return CodeNode(code, description, (), (f"{code} applies",), (), list(children) or ())
+
+def write(folder, name, roots):
+    folder.mkdir(exist_ok=True)
+    return output.export(roots, "json", str(folder / f"{name}_Applicable_Approximate.json"))
+
+def run(old, new):
+    return list(diff.diff(str(old), str(new)))
+
+
+@pytest.fixture
+def runs(tmp_path):
+    old, new = tmp_path / "old", tmp_path / "new"
+    write(old, "A", [node("A00", "Cholera", [node("A00.0", "Classical"), node("A00.9", "Other")]),
+                     node("A01", "Typhoid", [node("A01.0", "Typhoid fever")])])
+    write(old, "B", [node("B00", "Herpes")])
+    # A00.9 renamed, A01.0 gone, A01.1 new, A00.0 under A01, and A01 left A for B
+    write(new, "A", [node("A00", "Cholera", [node("A00.9", "Unspecified")])])
+    write(new, "B", [node("A01", "Typhoid", [node("A00.0", "Classical"),
+                                            node("A01.1", "Paratyphoid")]),
+                     node("B00", "Herpes")])
+    return old, new
+
+
+def test_changeset_rebuilds_the_new_run(runs):
+    old, new = runs
+    changes = run(old, new)
+    codes = diff.flat_codes(*sorted(str(p) for p in old.iterdir()))
+    diff.apply(codes, changes)
+    assert codes == diff.flat_codes(*sorted(str(p) for p in new.iterdir()))
+
+
+def test_removes_come_after_every_file(runs):
+    ops = [rec["op"] for rec in run(*runs)]
+    assert ops.index("remove") > max(i for i, op in enumerate(ops) if op != "remove")
+
+
+def test_code_moved_between_files_is_kept(runs):
+    by_code = {}
+    for rec in run(*runs):
+        by_code.setdefault(rec["code"], []).append(rec)
+    moved = by_code["A01"]
+    assert [rec["op"] for rec in moved] == ["add", "remove"]
+    assert moved[1]["moved_to"] == "B_Applicable_Approximate.json"
+    assert "moved_to" not in by_code["A01.0"][0]
+
+
+def test_identical_runs_have_no_changes(runs):
+    old, _ = runs
+    skipped = []
+    assert list(diff.diff(str(old), str(old), skipped)) == []
+    assert len(skipped) == 2
+
+
+def test_file_and_folder_is_an_error(runs, capsys):
+    old, new = runs
+    with pytest.raises(ValueError, match="not a file and a folder"):
+        run(old / "A_Applicable_Approximate.json", new)
+    assert cli.main(["diff", str(old / "A_Applicable_Approximate.json"), str(new)]) == 2
+    assert "not a file and a folder" in capsys.readouterr().err
+
+
+def test_cli_writes_json_lines(runs, tmp_path):
+    out = tmp_path / "changes.jsonl"
+    assert cli.main(["diff", *map(str, runs), "--out", str(out)]) == 1
+    with open(out, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == run(*runs)
@@ -0,0 +1,65 @@
+import pytest
+
+from icdscrape import dom, fixtures
+from icdscrape.discover import index_html
+from icdscrape.parse import get_sections, scrape_html
+
+# every installed backend must give bs4's answers, page for page
+
+# bs4-lxml notices the <?xml?> edge case; that is the point of it
+pytestmark = pytest.mark.filterwarnings("ignore::bs4.XMLParsedAsHTMLWarning")
+
+NODES = fixtures.synthetic_tree(roots=2, breadth=3, depth=1) + [{
+    "code": "A00",
+    "description": "Cholera & <typhoid> – Chöléra",
+    "clinical_information": ["An acute\xa0diarrheal  illness.", "Caused by\nVibrio."],
+    "applicable_to": [],
+    "approximate_synonyms": ["Cholera \"classical\""],
+    "children": [{"code": "A00.0", "description": "Cholera due to Vibrio cholerae 01"},
+                 {"code": "A00.9", "description": "Cholera, unspecified"}],
+}]
+
+PAGES = [(n["code"], fixtures.render_page(n)) for n in fixtures.walk(NODES)]
+
+EDGE_CASES = [
+    ("A00", ""),
+    ("A00", "  \n\t"),
+    ("A00", "<!-- nothing here -->"),
+    ("A00", '<?xml version="1.0" encoding="iso-8859-1"?>' + PAGES[-3][1]),
+    ("A00", "<p>no body-content</p>"),
+]
+
+
+def extract_all(code, html):
+    page = scrape_html(html, code)
+    doc = dom.parse(html)
+    sections = get_sections(doc)
+    dom.backend().release(doc)
+    return page, sections, index_html(html)
+
+
+@pytest.fixture(params=dom.available())
+def backend(request):
+    dom.use("bs4")
+    reference = [extract_all(code, html) for code, html in PAGES + EDGE_CASES]
+    dom.use(request.param)
+    yield reference
+    dom.use("bs4")
+
+
+def test_pages_match_bs4(backend):
+    for (code, html), ref in zip(PAGES, backend):
+        assert extract_all(code, html) == ref, code
+
+
+def test_edge_cases_match_bs4(backend):
+    for (code, html), ref in zip(EDGE_CASES, backend[len(PAGES):]):
+        assert extract_all(code, html) == ref, repr(html[:40])
+
+
+def test_fixture_pages_are_read_back():
+    dom.use("bs4")
+    page = scrape_html(PAGES[-3][1], "A00")
+    assert page.description == "Cholera & <typhoid> – Chöléra"
+    assert page.clinical_information == ("An acute diarrheal illness.", "Caused by Vibrio.")
+    assert [code for code, _ in page.links] == ["A00.0", "A00.9"]
@@ -0,0 +1,94 @@
+import urllib.request
+from urllib.parse import urljoin
+
+import pytest
+from bs4 import BeautifulSoup
+
+from icdscrape import cli, crawl, engine, fetch, fixtures
+from icdscrape.parse import clean, get_description
+
+pytestmark = pytest.mark.usefixtures("offline_fetch")
+
+# ---------------------------------------------------------
+# THE ORIGINAL RECURSIVE SCRAPER (the letter scripts before the engine),
+# fetching with urllib and resolving links against the page URL so it
+# can crawl a FixtureServer
+# ---------------------------------------------------------
+def section(soup, heading):
+    header = soup.find(lambda t: t.name in ["span", "strong", "h3"]
+                       and heading in t.get_text().lower())
+    if not header:
+        return []
+    ul = header.find_next("ul")
+    if not ul:
+        return []
+    return [clean(li.get_text()) for li in ul.find_all("li")]
+
+def recursive_scrape_code(url, code):
+    with urllib.request.urlopen(url, timeout=10) as r:
+        soup = BeautifulSoup(r.read().decode("utf-8"), "html.parser")
+
+    node = {
+        "code": code,
+        "description": get_description(soup, code),
+        "clinical_information": section(soup, "clinical information"),
+        "applicable_to": section(soup, "applicable to"),
+        "approximate_synonyms": section(soup, "approximate synonyms"),
+        "children": [],
+    }
+
+    body = soup.find("div", class_="body-content")
+    if not body:
+        return node
+
+    seen = set()
+    for a in body.find_all("a", href=True):
+        t = clean(a.get_text() or "")
+        if not t:
+            continue
+        c_code = t.split(" ")[0]
+        if (c_code.startswith(code) and len(c_code) > len(code) and "-" not in c_code
+                and "/ICD10CM/Codes/" in a["href"]):
+            if c_code not in seen:
+                seen.add(c_code)
+                child = recursive_scrape_code(urljoin(url, a["href"]), c_code)
+                if child:
+                    node["children"].append(child)
+    return node
+
+
+# the grandchild tree puts one page in two places
+@pytest.fixture(scope="module")
+def server():
+    with fixtures.FixtureServer(fixtures.grandchild_tree) as srv:
+        yield srv
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_engine_matches_recursive_scraper(server, workers):
+    expected = [recursive_scrape_code(url, code) for code, url in server.roots]
+    fetch.reset_counts()
+
+    crawled = []
+    engine.scrape_groups({None: server.roots}, lambda _, node: crawled.append(node.to_dict()),
+                         lambda _: None, workers=workers)
+
+    assert crawled == expected
+    # the twice-linked page was fetched once and still appears twice
+    assert not fetch.refetched()
+    assert len(fetch.fetch_counts()) == server.pages
+
+
+def test_scrape_code_blocking_api(server):
+    code, url = server.roots[1]
+    assert engine.scrape_code(url, code).to_dict() == recursive_scrape_code(url, code)
+
+
+def test_crawl_fails_when_a_letter_is_skipped(tmp_path, monkeypatch):
+    async def nothing_found(client, letters, max_in_flight):
+        return {letter: ([], []) for letter in letters}
+
+    monkeypatch.setattr(crawl, "discover", nothing_found)
+    assert crawl.crawl(["A"], str(tmp_path), journal_dir=None) is False
+    assert cli.main(["crawl", "--letters", "A", "--out", str(tmp_path), "--no-journal",
+                     "--progress", "off"]) == 1
@@ -0,0 +1,95 @@
+import asyncio
+import http.server
+import os
+import threading
+
+import pytest
+
+from icdscrape import cli, fetch
+from icdscrape.archive import ArchiveReader, ArchiveWriter, index_path
+
+pytestmark = pytest.mark.usefixtures("offline_fetch")
+
+# ---------------------------------------------------------
+# a page with a stray byte or a charset nobody knows still comes back
+# (decoded with replacement characters) instead of failing the crawl
+# ---------------------------------------------------------
+BODIES = {
+    "/bad-byte": ("text/html; charset=utf-8", b"<p>Chol\xe9ra</p>"),
+    "/bad-charset": ("text/html; charset=x-no-such-charset", b"<p>Cholera</p>"),
+    "/latin-1": ("text/html; charset=iso-8859-1", b"<p>Chol\xe9ra</p>"),
+}
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        ctype, body = BODIES[self.path]
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url):
+    async def run():
+        async with fetch.client() as client:
+            return await fetch.aget_html(client, asyncio.Semaphore(1), url)
+    return asyncio.run(run())
+
+
+def test_bad_byte_is_replaced(base_url):
+    assert get(base_url + "/bad-byte") == "<p>Chol�ra</p>"
+
+
+def test_unknown_charset_falls_back(base_url):
+    assert get(base_url + "/bad-charset") == "<p>Cholera</p>"
+
+
+def test_declared_charset_is_used(base_url):
+    assert get(base_url + "/latin-1") == "<p>Choléra</p>"
+
+
+def test_archive_keeps_the_server_bytes(base_url, tmp_path):
+    warc = str(tmp_path / "pages.warc.gz")
+    fetch.configure(record=warc)
+    assert get(base_url + "/latin-1") == "<p>Choléra</p>"
+    fetch.configure(record=None, replay=warc)
+    assert fetch.archive().get(base_url + "/latin-1").body == b"<p>Chol\xe9ra</p>"
+    assert get(base_url + "/latin-1") == "<p>Choléra</p>"
+
+
+def test_archive_index_rebuilds_from_the_records(tmp_path):
+    warc = str(tmp_path / "pages.warc.gz")
+    writer = ArchiveWriter(warc)
+    for n in range(50):
+        # bodies bigger than one inflate step as well as small ones
+        writer.add(f"http://x/{n}", 200, {}, bytes(range(256)) * (n * 20))
+    writer.close()
+    reader = ArchiveReader(warc)
+    written = reader.index
+    reader.close()
+    os.remove(index_path(warc))
+    reader = ArchiveReader(warc)
+    assert reader.index == written
+    assert reader.get("http://x/49").body == bytes(range(256)) * 980
+    reader.close()
+
+
+def test_replay_of_a_missing_archive(tmp_path, capsys):
+    missing = str(tmp_path / "nope.warc.gz")
+    assert cli.main(["crawl", "--letters", "A", "--replay", missing]) == 1
+    assert capsys.readouterr().out == f"❌ {missing} not found; record one with crawl --record\n"
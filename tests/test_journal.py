@@ -0,0 +1,70 @@
+import pytest
+
+from icdscrape import crawl, engine, fetch, fixtures
+from icdscrape.journal import journal_path
+
+pytestmark = pytest.mark.usefixtures("offline_fetch")
+
+
+# the grandchild tree with Q001's description edited; the edit also shows
+# in Q00's child list, so both pages' bodies change
+def changed_tree():
+    nodes = fixtures.grandchild_tree()
+    nodes[0]["children"][1]["description"] = "Edited condition Q001"
+    return nodes
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    # crawl(["A"], ...) against whatever FixtureServer is up on one fixed port
+    state = {}
+
+    async def fixture_roots(client, letters, max_in_flight):
+        return {"A": ([state["server"].url], state["server"].roots)}
+
+    def run(make_nodes, incremental=None):
+        with fixtures.FixtureServer(make_nodes, port=state.get("port", 0)) as server:
+            state["server"] = server
+            state["port"] = int(server.url.rsplit(":", 1)[1])
+            assert crawl.crawl(["A"], str(tmp_path), journal_dir=str(tmp_path / "journal"),
+                               incremental=incremental, manifest_dir=str(tmp_path / "manifest"))
+        with open(tmp_path / "A_Applicable_Approximate.json", "rb") as f:
+            return f.read(), server
+
+    monkeypatch.setattr(crawl, "discover", fixture_roots)
+    return run
+
+
+@pytest.mark.parametrize("mode, fetched, reused, unchanged", [
+    ("pages", 39, 0, 37),
+    ("subtrees", 10, 29, 8),
+])
+def test_incremental_crawl_sees_a_changed_page(site, mode, fetched, reused, unchanged):
+    site(fixtures.grandchild_tree)
+    again, _ = site(changed_tree, mode)
+
+    # only the requests and parses the mode promises...
+    assert len(fetch.fetch_counts()) == fetched
+    assert engine.reuse_summary() == (
+        f"INCREMENTAL: {reused} pages reused without a request, "
+        f"{unchanged} unchanged (not re-parsed), 2 changed, 0 new")
+
+    # ...for the same bytes as a full crawl of the edited site
+    full, _ = site(changed_tree)
+    assert again == full
+    assert b"Edited condition Q001" in again
+
+
+def test_resume_after_a_torn_journal_line(site, tmp_path):
+    full, server = site(fixtures.grandchild_tree)
+
+    # the finished run's journal, cut off halfway through its 21st line
+    with open(journal_path(str(tmp_path / "manifest"), "A"), "rb") as f:
+        lines = f.readlines()
+    with open(journal_path(str(tmp_path / "journal"), "A"), "wb") as f:
+        f.writelines(lines[:20])
+        f.write(lines[20][:len(lines[20]) // 2])
+
+    resumed, _ = site(fixtures.grandchild_tree)
+    assert resumed == full
+    assert len(fetch.fetch_counts()) == server.pages - 20
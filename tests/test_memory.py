@@ -0,0 +1,27 @@
+import pytest
+
+from icdscrape import dom
+from icdscrape.bench import depth_growth, depth_peaks
+
+# ---------------------------------------------------------
+# DOM LIFETIME: a crawl's peak memory must not grow with tree depth.
+# Only the bs4 backends build their trees on the Python heap, where
+# tracemalloc can see a DOM that release() failed to free.
+# ---------------------------------------------------------
+@pytest.fixture(params=[name for name in dom.available() if name.startswith("bs4")])
+def backend(request):
+    yield dom.use(request.param)
+    dom.use("bs4")
+
+
+def test_released_dom_keeps_peak_flat(backend):
+    grew_held, grew_released, flat = depth_growth(depth_peaks((1, 8)))
+    assert grew_held > 1e6            # the chain is big enough to notice
+    assert flat, f"peak grew {grew_released / 1e3:.0f} KB with depth ({backend.name})"
+
+
+def test_release_empties_the_soup():
+    dom.use("bs4")
+    doc = dom.parse("<html><body><ul><li>A00</li></ul></body></html>")
+    dom.backend().release(doc)
+    assert not doc.contents
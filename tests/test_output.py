@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from icdscrape import cli, fixtures, output
+from icdscrape.node import CodeNode
+
+
+def nodes():
+    return [CodeNode.from_dict(n) for n in fixtures.grandchild_tree()]
+
+
+@pytest.mark.parametrize("fmt", sorted(output.FORMATS))
+def test_every_format_loads_back(tmp_path, fmt):
+    roots = nodes()
+    path = output.export(roots, fmt, str(tmp_path / f"Q.{output.FORMATS[fmt].ext}"))
+    assert output.load_nodes(path) == roots
+
+
+def test_convert_from_json_lines(tmp_path):
+    roots = nodes()
+    src = output.export(roots, "jsonl", str(tmp_path / "Q_Applicable_Approximate.jsonl"))
+    cli.main(["convert", src, "--to", "json"])
+    with open(tmp_path / "Q_Applicable_Approximate.json", encoding="utf-8") as f:
+        assert json.load(f) == [root.to_dict() for root in roots]
+
+
+def test_json_lines_orphan_is_an_error(tmp_path):
+    path = tmp_path / "bad.jsonl"
+    rec = {"code": "Q001", "parent": "Q00", "depth": 1, "description": "",
+           "clinical_information": [], "applicable_to": [], "approximate_synonyms": []}
+    path.write_text(json.dumps(rec) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="before its parent"):
+        output.load_nodes(str(path))
+
+
+def test_json_lines_out_of_order(tmp_path):
+    # a crawl writes codes as pages finish: parents first, siblings in any order
+    roots = nodes()
+    path = output.export(roots, "jsonl", str(tmp_path / "Q.jsonl"))
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    lines = [line for _, _, line in sorted(
+        ((json.loads(line)["depth"], -n, line) for n, line in enumerate(lines)))]
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    assert output.load_nodes(path) == roots